@@ -22,7 +22,7 @@ from .database_manager import HibikidoDatabase
 from .embedding_manager import EmbeddingManager
 from .text_processor import TextProcessor
 from .main_server import HibikidoServer
-from .orchestrator import Orchestrator
+from .orchestrator import Orchestrator, ManifestationRequest
 from .osc_handler import OSCHandler
 
 __all__ = [
@@ -31,6 +31,7 @@ __all__ = [
     "TextProcessor", 
     "HibikidoServer",
     "Orchestrator",
+    "ManifestationRequest",
     "CSVImporter",
     "OSCHandler",
 ]
\ No newline at end of file
@@ -11,21 +11,35 @@ Handles MongoDB operations for the hierarchical schema with path-based reference
 - segmentations: Batch processing metadata
 """
 
+import weakref
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
-from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from pymongo import MongoClient, ReturnDocument
+from pymongo.client_session import ClientSession
+from pymongo.write_concern import WriteConcern
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Projections answered entirely from the (FAISS_index, path, description) indexes
+SEGMENT_LOOKUP_FIELDS = {"_id": 0, "FAISS_index": 1, "source_path": 1, "description": 1}
+PRESET_LOOKUP_FIELDS = {"_id": 0, "FAISS_index": 1, "effect_path": 1, "description": 1}
+
 class HibikidoDatabase:
+    # client -> names of its databases whose indexes were created in this process;
+    # keyed on the client in use (an injected one need not match self.uri), and
+    # weak so closed clients drop out
+    _indexes_ensured = weakref.WeakKeyDictionary()
+    
     def __init__(self, uri: str = "mongodb://localhost:27017", 
                  db_name: str = "hibikido"):
         self.uri = uri
         self.db_name = db_name
         self.client = None
         self.db = None
+        self._owns_client = False
         
         # Collection references
         self.recordings = None
@@ -35,10 +49,17 @@ class HibikidoDatabase:
         self.performances = None
         self.segmentations = None
     
-    def connect(self) -> bool:
-        """Initialize MongoDB connection and setup collections."""
+    def connect(self, client: MongoClient = None) -> bool:
+        """
+        Initialize MongoDB connection and setup collections.
+        
+        Args:
+            client: Existing MongoClient to share (connection pool and monitors)
+                    instead of creating one; it is left open by close()
+        """
         try:
-            self.client = MongoClient(self.uri)
+            self._owns_client = client is None
+            self.client = client if client is not None else MongoClient(self.uri)
             self.db = self.client[self.db_name]
             
             # Initialize collections
@@ -49,8 +70,11 @@ class HibikidoDatabase:
             self.performances = self.db.performances
             self.segmentations = self.db.segmentations
             
-            # Create indexes for better performance
-            self._create_indexes()
+            # Create indexes for better performance (once per database per process)
+            ensured = HibikidoDatabase._indexes_ensured.setdefault(self.client, set())
+            if self.db_name not in ensured:
+                if self._create_indexes():
+                    ensured.add(self.db_name)
             
             logger.info(f"Hibikidō database connected: {self.db_name}")
             return True
@@ -59,7 +83,14 @@ class HibikidoDatabase:
             logger.error(f"MongoDB connection failed: {e}")
             return False
     
-    def _create_indexes(self):
+    @classmethod
+    def forget_indexes(cls, client: MongoClient, db_name: str):
+        """Forget that db_name's indexes exist on client, e.g. after dropping the database."""
+        ensured = cls._indexes_ensured.get(client)
+        if ensured is not None:
+            ensured.discard(db_name)
+    
+    def _create_indexes(self) -> bool:
         """Create database indexes for optimal performance."""
         try:
             # Recordings indexes (path-based)
@@ -67,9 +98,11 @@ class HibikidoDatabase:
             self.recordings.create_index([("description", "text")])
             
             # Segments indexes (reference by source_path)
-            self.segments.create_index("source_path")
+            # (source_path, start) serves source_path lookups and their start-ordered sort
+            self.segments.create_index([("source_path", 1), ("start", 1)])
             self.segments.create_index("segmentation_id")
             self.segments.create_index("FAISS_index", unique=True, sparse=True)
+            self.segments.create_index([("FAISS_index", 1), ("source_path", 1), ("description", 1)])
             self.segments.create_index([("description", "text"), ("embedding_text", "text")])
             self.segments.create_index([("start", 1), ("end", 1)])
             
@@ -81,6 +114,7 @@ class HibikidoDatabase:
             # Presets indexes (separate collection, reference by effect_path)
             self.presets.create_index("effect_path")
             self.presets.create_index("FAISS_index", unique=True, sparse=True)
+            self.presets.create_index([("FAISS_index", 1), ("effect_path", 1), ("description", 1)])
             self.presets.create_index([("description", "text"), ("embedding_text", "text")])
             
             # Performances indexes
@@ -92,12 +126,15 @@ class HibikidoDatabase:
             self.segmentations.create_index("method")
             
             logger.debug("Database indexes created")
+            return True
         except Exception as e:
             logger.warning(f"Failed to create some indexes: {e}")
+            return False
     
     # RECORDINGS METHODS (path-based)
     
-    def add_recording(self, path: str, description: str) -> bool:
+    def add_recording(self, path: str, description: str,
+                      session: ClientSession = None) -> bool:
         """Add a new recording using path as unique identifier."""
         try:
             recording = {
@@ -106,7 +143,7 @@ class HibikidoDatabase:
                 "created_at": datetime.now()
             }
             
-            self.recordings.insert_one(recording)
+            self.recordings.insert_one(recording, session=session)
             logger.info(f"Added recording: {path}")
             return True
             
@@ -117,6 +154,40 @@ class HibikidoDatabase:
             logger.error(f"Failed to add recording: {e}")
             return False
     
+    def add_recording_returning(self, path: str, description: str,
+                                session: ClientSession = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Insert a recording if its path is new and return the stored document.
+        
+        One find_one_and_update upsert, so callers needn't read the recording
+        back. An existing path is left untouched and its document returned.
+        
+        Returns:
+            (recording, inserted): inserted is False when the path already
+            existed; (None, False) on failure
+        """
+        try:
+            # Our own _id only ends up stored if the upsert inserted
+            new_id = ObjectId()
+            recording = self.recordings.find_one_and_update(
+                {"path": path},
+                {"$setOnInsert": {"_id": new_id, "description": description,
+                                  "created_at": datetime.now()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+                session=session
+            )
+            inserted = recording["_id"] == new_id
+            if inserted:
+                logger.info(f"Added recording: {path}")
+            else:
+                logger.debug(f"Recording already exists: {path}")
+            return recording, inserted
+            
+        except Exception as e:
+            logger.error(f"Failed to add recording: {e}")
+            return None, False
+    
     def get_recording_by_path(self, path: str) -> Optional[Dict[str, Any]]:
         """Get recording by path."""
         try:
@@ -125,10 +196,10 @@ class HibikidoDatabase:
             logger.error(f"Failed to get recording {path}: {e}")
             return None
     
-    def get_all_recordings(self) -> List[Dict[str, Any]]:
-        """Get all recordings."""
+    def get_all_recordings(self, projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Get all recordings, optionally projecting fields."""
         try:
-            return list(self.recordings.find())
+            return list(self.recordings.find({}, projection))
         except Exception as e:
             logger.error(f"Failed to get recordings: {e}")
             return []
@@ -137,23 +208,16 @@ class HibikidoDatabase:
     
     def add_segment(self, source_path: str, segmentation_id: str,
                    start: float, end: float, description: str, 
-                   embedding_text: str, faiss_index: int = None) -> bool:
-        """Add a new segment referencing recording by path."""
+                   embedding_text: str, faiss_index: int = None,
+                   session: ClientSession = None,
+                   metadata: Dict[str, Any] = None) -> bool:
+        """Add a new segment referencing recording by path (metadata: extra fields)."""
         try:
-            segment = {
-                "source_path": source_path,
-                "segmentation_id": segmentation_id,
-                "start": start,
-                "end": end,
-                "description": description,
-                "embedding_text": embedding_text,
-                "created_at": datetime.now()
-            }
-            
-            if faiss_index is not None:
-                segment["FAISS_index"] = faiss_index
+            segment = self._segment_document(source_path, segmentation_id, start, end,
+                                             description, embedding_text, faiss_index,
+                                             metadata=metadata)
             
-            result = self.segments.insert_one(segment)
+            result = self.segments.insert_one(segment, session=session)
             logger.info(f"Added segment: {result.inserted_id} - {description[:50]}")
             return True
             
@@ -161,25 +225,84 @@ class HibikidoDatabase:
             logger.error(f"Failed to add segment: {e}")
             return False
     
-    def get_segment_by_faiss_id(self, faiss_index: int) -> Optional[Dict[str, Any]]:
-        """Get segment by FAISS index."""
+    def add_segments_bulk(self, segments: List[Dict[str, Any]],
+                          write_concern: WriteConcern = None,
+                          session: ClientSession = None,
+                          bypass_validation: bool = False) -> int:
+        """
+        Add many segments with a single insert_many.
+        
+        Args:
+            segments: Dicts of add_segment keyword arguments
+            write_concern: Override for this insert (e.g. w=0 for test data loads)
+            session: Optional session/transaction to run the insert in
+            bypass_validation: Skip server-side schema validation (trusted test data)
+            
+        Returns:
+            Number of segments inserted (sent, for unacknowledged writes)
+        """
+        if not segments:
+            return 0
+        
+        created_at = datetime.now()
+        documents = [self._segment_document(created_at=created_at, **segment)
+                     for segment in segments]
+        return self._insert_bulk(self.segments, documents, "segments", write_concern,
+                                 session, bypass_validation)
+    
+    @staticmethod
+    def _segment_document(source_path: str, segmentation_id: str,
+                          start: float, end: float, description: str,
+                          embedding_text: str, faiss_index: int = None,
+                          created_at: datetime = None,
+                          metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build a segment document; metadata (e.g. freq_low/freq_high/duration) is merged in."""
+        segment = {
+            "source_path": source_path,
+            "segmentation_id": segmentation_id,
+            "start": start,
+            "end": end,
+            "description": description,
+            "embedding_text": embedding_text,
+            "created_at": created_at or datetime.now()
+        }
+        
+        if faiss_index is not None:
+            segment["FAISS_index"] = faiss_index
+        
+        if metadata:
+            segment.update(metadata)
+        
+        return segment
+    
+    def get_segment_by_faiss_id(self, faiss_index: int,
+                                projection: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Get segment by FAISS index (SEGMENT_LOOKUP_FIELDS gives an index-only read)."""
         try:
-            return self.segments.find_one({"FAISS_index": faiss_index})
+            return self.segments.find_one({"FAISS_index": faiss_index}, projection)
         except Exception as e:
             logger.error(f"Failed to get segment with FAISS index {faiss_index}: {e}")
             return None
     
-    def get_segments_by_recording_path(self, source_path: str) -> List[Dict[str, Any]]:
-        """Get all segments for a recording by path."""
+    def get_segments_by_recording_path(self, source_path: str,
+                                       projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Get all segments for a recording by path, ordered by start.
+        
+        The filter and sort follow the (source_path, start) index, so no in-memory
+        sort is needed; a projection limited to those fields (with _id excluded)
+        is answered from the index alone.
+        """
         try:
-            return list(self.segments.find({"source_path": source_path}).sort("start", 1))
+            return list(self.segments.find({"source_path": source_path}, projection)
+                        .sort([("source_path", 1), ("start", 1)]))
         except Exception as e:
             logger.error(f"Failed to get segments for recording {source_path}: {e}")
             return []
         
     def add_segmentation(self, segmentation_id: str, method: str, 
                     parameters: Dict[str, Any] = None, 
-                    description: str = "") -> bool:
+                    description: str = "", session: ClientSession = None) -> bool:
         """Add a new segmentation method/run."""
         try:
             segmentation = {
@@ -190,7 +313,7 @@ class HibikidoDatabase:
                 "created_at": datetime.now()
             }
             
-            self.segmentations.insert_one(segmentation)
+            self.segmentations.insert_one(segmentation, session=session)
             logger.info(f"Added segmentation: {segmentation_id} - {method}")
             return True
             
@@ -211,7 +334,8 @@ class HibikidoDatabase:
         
     # EFFECTS METHODS (path-based)
     
-    def add_effect(self, path: str, name: str, description: str = "") -> bool:
+    def add_effect(self, path: str, name: str, description: str = "",
+                   session: ClientSession = None) -> bool:
         """Add a new effect using path as unique identifier."""
         try:
             effect = {
@@ -221,7 +345,7 @@ class HibikidoDatabase:
                 "created_at": datetime.now()
             }
             
-            self.effects.insert_one(effect)
+            self.effects.insert_one(effect, session=session)
             logger.info(f"Added effect: {path} - {name}")
             return True
             
@@ -244,21 +368,13 @@ class HibikidoDatabase:
     
     def add_preset(self, effect_path: str, parameters: List[Any], 
                   description: str, embedding_text: str, 
-                  faiss_index: int = None) -> bool:
+                  faiss_index: int = None, session: ClientSession = None) -> bool:
         """Add a new preset to separate presets collection."""
         try:
-            preset = {
-                "effect_path": effect_path,
-                "parameters": parameters,
-                "description": description,
-                "embedding_text": embedding_text,
-                "created_at": datetime.now()
-            }
-            
-            if faiss_index is not None:
-                preset["FAISS_index"] = faiss_index
+            preset = self._preset_document(effect_path, parameters, description,
+                                           embedding_text, faiss_index)
             
-            result = self.presets.insert_one(preset)
+            result = self.presets.insert_one(preset, session=session)
             logger.info(f"Added preset: {result.inserted_id} - {description[:50]}")
             return True
             
@@ -266,18 +382,86 @@ class HibikidoDatabase:
             logger.error(f"Failed to add preset: {e}")
             return False
     
-    def get_preset_by_faiss_id(self, faiss_index: int) -> Optional[Dict[str, Any]]:
-        """Get preset by FAISS index."""
+    def add_presets_bulk(self, presets: List[Dict[str, Any]],
+                         write_concern: WriteConcern = None,
+                         session: ClientSession = None,
+                         bypass_validation: bool = False) -> int:
+        """
+        Add many presets with a single insert_many.
+        
+        Args:
+            presets: Dicts of add_preset keyword arguments
+            write_concern: Override for this insert (e.g. w=0 for test data loads)
+            session: Optional session/transaction to run the insert in
+            bypass_validation: Skip server-side schema validation (trusted test data)
+            
+        Returns:
+            Number of presets inserted (sent, for unacknowledged writes)
+        """
+        if not presets:
+            return 0
+        
+        created_at = datetime.now()
+        documents = [self._preset_document(created_at=created_at, **preset)
+                     for preset in presets]
+        return self._insert_bulk(self.presets, documents, "presets", write_concern,
+                                 session, bypass_validation)
+    
+    @staticmethod
+    def _preset_document(effect_path: str, parameters: List[Any],
+                         description: str, embedding_text: str,
+                         faiss_index: int = None,
+                         created_at: datetime = None) -> Dict[str, Any]:
+        """Build a preset document."""
+        preset = {
+            "effect_path": effect_path,
+            "parameters": parameters,
+            "description": description,
+            "embedding_text": embedding_text,
+            "created_at": created_at or datetime.now()
+        }
+        
+        if faiss_index is not None:
+            preset["FAISS_index"] = faiss_index
+        
+        return preset
+    
+    def _insert_bulk(self, collection, documents: List[Dict[str, Any]], label: str,
+                     write_concern: WriteConcern = None,
+                     session: ClientSession = None,
+                     bypass_validation: bool = False) -> int:
+        """Unordered insert_many; duplicates are skipped without aborting the batch."""
+        try:
+            if write_concern is not None:
+                collection = collection.with_options(write_concern=write_concern)
+            result = collection.insert_many(documents, ordered=False, session=session,
+                                            bypass_document_validation=bypass_validation)
+            inserted = len(result.inserted_ids)
+            logger.info(f"Added {inserted} {label}")
+            return inserted
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            logger.warning(f"Added {inserted}/{len(documents)} {label}; "
+                           f"{len(e.details.get('writeErrors', []))} rejected")
+            return inserted
+        except Exception as e:
+            logger.error(f"Failed to add {label}: {e}")
+            return 0
+    
+    def get_preset_by_faiss_id(self, faiss_index: int,
+                               projection: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Get preset by FAISS index (PRESET_LOOKUP_FIELDS gives an index-only read)."""
         try:
-            return self.presets.find_one({"FAISS_index": faiss_index})
+            return self.presets.find_one({"FAISS_index": faiss_index}, projection)
         except Exception as e:
             logger.error(f"Failed to get preset with FAISS index {faiss_index}: {e}")
             return None
     
-    def get_presets_by_effect_path(self, effect_path: str) -> List[Dict[str, Any]]:
-        """Get all presets for an effect by path."""
+    def get_presets_by_effect_path(self, effect_path: str,
+                                   projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Get all presets for an effect by path, optionally projecting fields."""
         try:
-            return list(self.presets.find({"effect_path": effect_path}))
+            return list(self.presets.find({"effect_path": effect_path}, projection))
         except Exception as e:
             logger.error(f"Failed to get presets for effect {effect_path}: {e}")
             return []
@@ -298,16 +482,71 @@ class HibikidoDatabase:
             logger.error(f"Failed to get presets without embeddings: {e}")
             return []
     
+    # BULK LOADING
+    
+    def bulk_initial_load(self, recordings: List[Dict[str, Any]] = None,
+                          segments: List[Dict[str, Any]] = None,
+                          effects: List[Dict[str, Any]] = None,
+                          presets: List[Dict[str, Any]] = None,
+                          session: ClientSession = None,
+                          bypass_validation: bool = False) -> Dict[str, int]:
+        """
+        Load a batch of related documents with one insert_many per collection.
+        
+        Args:
+            recordings: Dicts of add_recording keyword arguments
+            segments: Dicts of add_segment keyword arguments
+            effects: Dicts of add_effect keyword arguments
+            presets: Dicts of add_preset keyword arguments
+            session: Optional session; pass one inside a transaction to commit
+                the whole load as a unit
+            bypass_validation: Skip server-side schema validation (trusted test data)
+            
+        Returns:
+            Number of documents inserted per collection
+        """
+        created_at = datetime.now()
+        counts = {"recordings": 0, "segments": 0, "effects": 0, "presets": 0}
+        
+        if recordings:
+            counts["recordings"] = self._insert_bulk(self.recordings, [
+                {"path": rec["path"], "description": rec["description"],
+                 "created_at": created_at}
+                for rec in recordings
+            ], "recordings", session=session, bypass_validation=bypass_validation)
+        
+        if segments:
+            counts["segments"] = self._insert_bulk(self.segments, [
+                self._segment_document(created_at=created_at, **segment)
+                for segment in segments
+            ], "segments", session=session, bypass_validation=bypass_validation)
+        
+        if effects:
+            counts["effects"] = self._insert_bulk(self.effects, [
+                {"path": effect["path"], "name": effect["name"],
+                 "description": effect.get("description", ""), "created_at": created_at}
+                for effect in effects
+            ], "effects", session=session, bypass_validation=bypass_validation)
+        
+        if presets:
+            counts["presets"] = self._insert_bulk(self.presets, [
+                self._preset_document(created_at=created_at, **preset)
+                for preset in presets
+            ], "presets", session=session, bypass_validation=bypass_validation)
+        
+        return counts
+    
     # PERFORMANCES METHODS (unchanged)
     
     def add_performance(self, performance_id: str, date: datetime = None) -> bool:
         """Add a new performance session."""
         try:
+            now = datetime.now()
             performance = {
                 "_id": performance_id,
-                "date": date or datetime.now(),
+                "date": date or now,
                 "invocations": [],
-                "created_at": datetime.now()
+                "created_at": now
             }
             
             self.performances.insert_one(performance)
@@ -350,11 +589,10 @@ class HibikidoDatabase:
         """Get comprehensive database statistics."""
         try:
             recordings_count = self.recordings.count_documents({})
-            segments_count = self.segments.count_documents({})
-            segments_with_embeddings = self.segments.count_documents({"FAISS_index": {"$exists": True}})
+            segments_count, segments_with_embeddings = self._count_with_embeddings(self.segments)
             effects_count = self.effects.count_documents({})
-            presets_count = self.presets.count_documents({})  # Now separate collection
-            presets_with_embeddings = self.presets.count_documents({"FAISS_index": {"$exists": True}})
+            # Now separate collection
+            presets_count, presets_with_embeddings = self._count_with_embeddings(self.presets)
             performances_count = self.performances.count_documents({})
             segmentations_count = self.segmentations.count_documents({})
             
@@ -374,8 +612,20 @@ class HibikidoDatabase:
             logger.error(f"Failed to get stats: {e}")
             return {}
     
+    def _count_with_embeddings(self, collection) -> Tuple[int, int]:
+        """Count all documents and those with a FAISS_index in one $facet aggregation."""
+        result = next(collection.aggregate([{"$facet": {
+            "total": [{"$count": "n"}],
+            "embedded": [{"$match": {"FAISS_index": {"$exists": True}}}, {"$count": "n"}]
+        }}]), {})
+        
+        # $count emits nothing for an empty input, hence the defaults
+        total = result.get("total") or [{"n": 0}]
+        embedded = result.get("embedded") or [{"n": 0}]
+        return total[0]["n"], embedded[0]["n"]
+    
     def close(self):
-        """Close the database connection."""
-        if self.client:
+        """Close the database connection (a shared client stays open for its owner)."""
+        if self.client and self._owns_client:
             self.client.close()
             logger.info("MongoDB connection closed")
\ No newline at end of file
@@ -2,34 +2,153 @@
 Embedding Manager for Hibikidō
 ==============================
 
-Simple FAISS search with MongoDB document retrieval.
+FAISS (HNSW) search with MongoDB document retrieval.
 FAISS indices stored in MongoDB documents as per original schema.
 """
 
 import os
-import faiss
-import torch
-from sentence_transformers import SentenceTransformer
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Fields read while rebuilding embeddings; everything else stays in MongoDB
+SEGMENT_REBUILD_FIELDS = {"description": 1, "source_path": 1, "segmentation_id": 1,
+                          "embedding_text": 1, "FAISS_index": 1}
+PRESET_REBUILD_FIELDS = {"description": 1, "effect_path": 1,
+                         "embedding_text": 1, "FAISS_index": 1}
+# Without a text processor the stored embedding_text is all a rebuild needs
+STORED_TEXT_REBUILD_FIELDS = {"embedding_text": 1, "FAISS_index": 1}
+# Fields returned with search hits (what invocation/manifestation reads)
+SEGMENT_SEARCH_FIELDS = {"FAISS_index": 1, "source_path": 1, "segmentation_id": 1,
+                         "start": 1, "end": 1, "description": 1, "embedding_text": 1,
+                         "freq_low": 1, "freq_high": 1, "duration": 1}
+PRESET_SEARCH_FIELDS = {"FAISS_index": 1, "effect_path": 1, "parameters": 1,
+                        "description": 1, "embedding_text": 1}
+REBUILD_CURSOR_BATCH = 1000
+REBUILD_ENCODE_CHUNK = 256
+ENCODE_BATCH_SIZE = 64
+QUERY_CACHE_SIZE = 256
+SEMANTIC_CACHE_SIZE = 40
+# HNSW graph parameters: neighbours per node, build and search beam widths
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+SEMANTIC_CACHE_THRESHOLD = 0.95
+
+
+def _chunked(iterable, size: int):
+    """Yield lists of up to size items from an iterable (e.g. a cursor)."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class SemanticResultCache:
+    """
+    Reuse search results for queries whose embeddings are near-identical.
+    
+    Holds up to max_entries normalized query embeddings with their result
+    lists; a lookup with cosine similarity >= threshold to a cached query
+    returns that query's results, skipping FAISS and MongoDB entirely.
+    """
+    
+    def __init__(self, dim: int, max_entries: int = SEMANTIC_CACHE_SIZE,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self.clear()
+    
+    def clear(self):
+        """Drop all cached results (the index or documents changed)."""
+        with self._lock:
+            self._embeddings = np.empty((0, self.dim), dtype=np.float32)
+            self._top_ks = []   # row-aligned with _embeddings
+            self._entries = []  # result lists, row-aligned with _embeddings
+            self.hits = 0
+            self.misses = 0
+    
+    def lookup(self, embedding: np.ndarray, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Cached results for a similar query searched with at least top_k, else None."""
+        with self._lock:
+            if self._entries:
+                # Only entries searched with at least top_k results can answer
+                similarities = np.where(np.asarray(self._top_ks) >= top_k,
+                                        self._embeddings @ embedding, -np.inf)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    return self._entries[best][:top_k]
+            self.misses += 1
+            return None
+    
+    def add(self, embedding: np.ndarray, top_k: int, results: List[Dict[str, Any]]):
+        """Cache results for a query, evicting the oldest entry when full."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._embeddings = self._embeddings[1:]
+                self._top_ks.pop(0)
+                self._entries.pop(0)
+            self._embeddings = np.vstack([self._embeddings, embedding.reshape(1, -1)])
+            self._top_ks.append(top_k)
+            self._entries.append(list(results))
+
+
 class EmbeddingManager:
     """Simple embedding manager following original database design."""
     
     def __init__(self, model_name: str = "all-MiniLM-L6-v2", 
-                 index_file: str = "hibikido.index"):
+                 index_file: str = "hibikido.index",
+                 embedding_cache_dir: Optional[str] = None,
+                 mmap_index: bool = False, model=None):
         self.model_name = model_name
         self.index_file = index_file
-        self.model = None
+        
+        # Map an existing index file's vector codes instead of reading them onto
+        # the heap; the index is copied into memory before the first add
+        self.mmap_index = mmap_index
+        self._index_mapped = False
+        
+        # Optional on-disk cache of rebuild embeddings, one file per text in a
+        # subdirectory per model, so rebuilding unchanged data skips the encode pass
+        self.embedding_cache_dir = embedding_cache_dir
+        self._cache_files_used = set()
+        
+        # An already loaded SentenceTransformer for model_name may be shared
+        # between managers; initialize() then skips loading it again
+        self.model = model
         self.index = None
         self.next_id = 0
         self.embedding_dim = 384  # all-MiniLM-L6-v2 dimension
+        
+        # LRU cache of normalized query embeddings (repeated incantations)
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.RLock()
+        self._query_cache_hits = 0
+        self._query_cache_misses = 0
+        
+        # Result lists for near-duplicate queries; cleared whenever the index changes
+        self.result_cache = SemanticResultCache(self.embedding_dim)
     
     def initialize(self) -> bool:
-        """Initialize the embedding model and FAISS index."""
-        if not self._load_model():
+        """Initialize the embedding model (unless one was passed in) and FAISS index."""
+        if self.model is None and not self._load_model():
             return False
         if not self._load_or_create_index():
             return False
@@ -38,10 +157,15 @@ class EmbeddingManager:
     def _load_model(self) -> bool:
         """Load the sentence transformer model."""
         try:
+            # Deferred so importing hibikido doesn't pay for torch start-up
+            import torch
+            from sentence_transformers import SentenceTransformer
+            
             device = "cuda" if torch.cuda.is_available() else "cpu"
             logger.info(f"Loading embedding model: {self.model_name}")
             
             self.model = SentenceTransformer(self.model_name, device=device)
+            self.clear_query_cache()
             logger.info(f"Embedding model loaded on: {device.upper()}")
             return True
             
@@ -52,12 +176,21 @@ class EmbeddingManager:
     def _load_or_create_index(self) -> bool:
         """Load existing FAISS index or create a new one."""
         try:
+            import faiss
+            
             if os.path.exists(self.index_file):
-                self.index = faiss.read_index(self.index_file)
+                if self.mmap_index:
+                    self.index = faiss.read_index(self.index_file, faiss.IO_FLAG_MMAP_IFC)
+                    self._index_mapped = True
+                else:
+                    self.index = faiss.read_index(self.index_file)
+                if hasattr(self.index, "hnsw"):
+                    self.index.hnsw.efSearch = HNSW_EF_SEARCH
                 self.next_id = self.index.ntotal
                 logger.info(f"Loaded FAISS index with {self.index.ntotal} entries")
             else:
-                self.index = faiss.IndexFlatIP(self.embedding_dim)
+                self.index = self._create_index()
+                self._index_mapped = False
                 self.next_id = 0
                 self._save_index()
                 logger.info("Created new FAISS index")
@@ -68,10 +201,40 @@ class EmbeddingManager:
             logger.error(f"Failed to initialize FAISS index: {e}")
             return False
     
+    def _create_index(self):
+        """
+        Create an empty HNSW index over inner product (cosine on normalized vectors).
+        
+        Vectors are stored as FP16, halving memory and bandwidth per distance;
+        embeddings are already L2-normalized by encode().
+        """
+        import faiss
+        
+        index = faiss.IndexHNSWSQ(self.embedding_dim, faiss.ScalarQuantizer.QT_fp16,
+                                  HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+    
+    def _ensure_writable_index(self):
+        """Load a memory-mapped index into memory so it can be added to."""
+        if self._index_mapped:
+            import faiss
+            
+            self.index = faiss.read_index(self.index_file)
+            if hasattr(self.index, "hnsw"):
+                self.index.hnsw.efSearch = HNSW_EF_SEARCH
+            self._index_mapped = False
+    
     def _save_index(self) -> bool:
-        """Save FAISS index to disk."""
+        """Save FAISS index to disk (write to a temp file, then rename over)."""
         try:
-            faiss.write_index(self.index, self.index_file)
+            import faiss
+            
+            # Atomic replace: readers, including a mapped index, keep the old file
+            temp_file = f"{self.index_file}.tmp"
+            faiss.write_index(self.index, temp_file)
+            os.replace(temp_file, self.index_file)
             logger.debug("FAISS index saved")
             return True
         except Exception as e:
@@ -94,13 +257,14 @@ class EmbeddingManager:
                 return None
             
             # Create embedding
-            embedding = self.model.encode(text.strip(), normalize_embeddings=True)
-            embedding = embedding.reshape(1, -1)
+            embedding = self._encode_texts([text.strip()])
             
             # Add to FAISS index
+            self._ensure_writable_index()
             faiss_id = self.next_id
             self.index.add(embedding)
             self.next_id += 1
+            self.result_cache.clear()
             
             # Save to disk
             self._save_index()
@@ -112,6 +276,128 @@ class EmbeddingManager:
             logger.error(f"Failed to add embedding: {e}")
             return None
     
+    def add_embeddings_batch(self, texts: List[str], save: bool = True,
+                             use_cache: bool = False) -> List[Optional[int]]:
+        """
+        Add many text embeddings with a single encode and FAISS add.
+        
+        Args:
+            texts: Texts to embed
+            save: Write the index to disk afterwards
+            use_cache: Read/write the embedding cache (rebuilds only)
+            
+        Returns:
+            FAISS index IDs aligned with texts (None for empty texts or on failure)
+        """
+        faiss_ids = [None] * len(texts)
+        positions = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not positions:
+            return faiss_ids
+        
+        try:
+            # Encode each distinct text once; duplicates (shared descriptions)
+            # reuse the same row
+            stripped = [texts[i].strip() for i in positions]
+            unique_texts = list(dict.fromkeys(stripped))
+            if use_cache and self.embedding_cache_dir:
+                unique_embeddings = self._encode_cached(unique_texts)
+            else:
+                unique_embeddings = self._encode_texts(unique_texts)
+            if len(unique_texts) == len(stripped):
+                embeddings = unique_embeddings
+            else:
+                row_of = {text: row for row, text in enumerate(unique_texts)}
+                embeddings = unique_embeddings[[row_of[text] for text in stripped]]
+            
+            self._ensure_writable_index()
+            first_id = self.next_id
+            self.index.add(embeddings)
+            self.next_id += len(positions)
+            self.result_cache.clear()
+            
+            for offset, i in enumerate(positions):
+                faiss_ids[i] = first_id + offset
+            
+            if save:
+                self._save_index()
+            
+            logger.debug(f"Added embeddings {first_id}-{self.next_id - 1}")
+            return faiss_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to add embedding batch: {e}")
+            return [None] * len(texts)
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Normalized embeddings for texts, in one batched encode.
+        
+        Every encode (rebuild chunks, adds, queries) goes through here.
+        """
+        return self.model.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+    
+    def _embedding_cache_model_dir(self) -> str:
+        """This model's subdirectory of the embedding cache; nothing outside it is pruned."""
+        return os.path.join(self.embedding_cache_dir, re.sub(r"[^\w.-]", "_", self.model_name))
+    
+    def _encode_cached(self, texts: List[str]) -> np.ndarray:
+        """
+        _encode_texts through the on-disk cache, one .npy file per text under
+        the model's subdirectory, so an edit only re-encodes the changed texts.
+        """
+        cache_dir = self._embedding_cache_model_dir()
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        misses = []
+        for row, text in enumerate(texts):
+            digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+            cache_file = os.path.join(cache_dir, f"{digest}.npy")
+            self._cache_files_used.add(cache_file)
+            
+            if os.path.exists(cache_file):
+                try:
+                    embedding = np.load(cache_file)
+                    if embedding.shape == (self.embedding_dim,):
+                        embeddings[row] = embedding
+                        continue
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable embedding cache {cache_file}: {e}")
+            misses.append((row, cache_file))
+        
+        if not misses:
+            return embeddings
+        
+        # One batched encode for every text not in the cache
+        encoded = self._encode_texts([texts[row] for row, _ in misses])
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            for (row, cache_file), embedding in zip(misses, encoded):
+                embeddings[row] = embedding
+                np.save(cache_file, embedding)
+        except Exception as e:
+            logger.warning(f"Failed to write embedding cache {cache_dir}: {e}")
+            embeddings[[row for row, _ in misses]] = encoded
+        return embeddings
+    
+    def _prune_embedding_cache(self):
+        """Delete this model's cached texts not used by the last rebuild (data has changed)."""
+        if not self.embedding_cache_dir:
+            return
+        cache_dir = self._embedding_cache_model_dir()
+        if not os.path.isdir(cache_dir):
+            return
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if name.endswith(".npy") and path not in self._cache_files_used:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Failed to prune embedding cache {path}: {e}")
+    
     def search(self, query: str, top_k: int = 10, db_manager=None) -> List[Dict[str, Any]]:
         """
         Search FAISS index and return MongoDB documents (updated for path-based schema).
@@ -124,57 +410,153 @@ class EmbeddingManager:
         Returns:
             List of {"collection": str, "document": dict, "score": float} dicts
         """
+        return self.search_batch([query], top_k, db_manager)[0]
+    
+    def search_batch(self, queries: List[str], top_k: int = 10,
+                     db_manager=None) -> List[List[Dict[str, Any]]]:
+        """
+        Search many queries with one encode and one multi-row FAISS search.
+        
+        Args:
+            queries: Search query texts
+            top_k: Maximum number of results per query
+            db_manager: Database manager for MongoDB lookups
+            
+        Returns:
+            One search() result list per query, in order (empty for blank queries)
+        """
+        results = [[] for _ in queries]
         try:
-            if not query or not query.strip():
-                return []
+            live = [(i, query.strip()) for i, query in enumerate(queries)
+                    if query and query.strip()]
+            if not live:
+                return results
             
             if self.index.ntotal == 0:
                 logger.info("Search called on empty index")
-                return []
+                return results
             
             if not db_manager:
                 logger.error("Database manager required for search")
-                return []
+                return results
+            
+            # Create query embeddings, encoding cache misses in one forward pass
+            query_embeddings = self._encode_queries([query for _, query in live])
             
-            # Create query embedding
-            query_embedding = self.model.encode(query.strip(), normalize_embeddings=True)
-            query_embedding = query_embedding.reshape(1, -1)
+            # Serve near-duplicate queries from the semantic cache
+            uncached = []
+            for row, (i, query) in enumerate(live):
+                cached = self.result_cache.lookup(query_embeddings[row], top_k)
+                if cached is None:
+                    uncached.append(row)
+                else:
+                    results[i] = cached
+                    logger.info(f"Search '{query}' returned {len(cached)} cached results")
             
-            # Search FAISS
+            if not uncached:
+                return results
+            
+            # Search FAISS with one (N, d) query matrix
             k = min(top_k, self.index.ntotal)
-            scores, indices = self.index.search(query_embedding, k)
+            scores, indices = self.index.search(query_embeddings[uncached], k)
+            
+            # Hydrate every row's hits from MongoDB in one round trip per collection
+            documents = self._lookup_documents(indices.ravel(), db_manager)
+            
+            for row, row_indices, row_scores in zip(uncached, indices, scores):
+                i, query = live[row]
+                results[i] = self._lookup_results(row_indices, row_scores, documents)
+                self.result_cache.add(query_embeddings[row], top_k, results[i])
+                logger.info(f"Search '{query}' returned {len(results[i])} results")
             
-            # MongoDB lookups by FAISS_index (updated for separate presets collection)
-            results = []
-            for faiss_idx, score in zip(indices[0], scores[0]):
-                # Convert numpy.int64 to regular Python int for MongoDB
-                faiss_idx = int(faiss_idx)
-                
-                # Look for segment with this FAISS_index
-                segment = db_manager.segments.find_one({"FAISS_index": faiss_idx})
-                if segment:
-                    results.append({
-                        "collection": "segments",
-                        "document": segment,
-                        "score": float(score)
-                    })
-                    continue
-                
-                # Look for preset with this FAISS_index (now in separate collection)
-                preset = db_manager.presets.find_one({"FAISS_index": faiss_idx})
-                if preset:
-                    results.append({
-                        "collection": "presets", 
-                        "document": preset,
-                        "score": float(score)
-                    })
-            
-            logger.info(f"Search '{query}' returned {len(results)} results")
             return results
             
         except Exception as e:
-            logger.error(f"Search failed for '{query}': {e}")
-            return []
+            logger.error(f"Search failed for {queries!r}: {e}")
+            return [[] for _ in queries]
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Normalized query embeddings, served from the LRU cache where possible."""
+        with self._query_cache_lock:
+            cached = [self._query_cache.get(query) for query in queries]
+            for query, embedding in zip(queries, cached):
+                if embedding is not None:
+                    self._query_cache.move_to_end(query)
+            misses = list(dict.fromkeys(q for q, e in zip(queries, cached) if e is None))
+            self._query_cache_hits += len(queries) - len(misses)
+            self._query_cache_misses += len(misses)
+        
+        if misses:
+            encoded = self._encode_texts(misses)
+            fresh = dict(zip(misses, encoded))
+            with self._query_cache_lock:
+                for query, embedding in fresh.items():
+                    self._query_cache[query] = embedding
+                    self._query_cache.move_to_end(query)
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+            cached = [fresh[q] if e is None else e for q, e in zip(queries, cached)]
+        
+        return np.vstack(cached).astype(np.float32, copy=False)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Query embedding cache statistics."""
+        with self._query_cache_lock:
+            lookups = self._query_cache_hits + self._query_cache_misses
+            return {
+                "hits": self._query_cache_hits,
+                "misses": self._query_cache_misses,
+                "hit_rate": self._query_cache_hits / lookups if lookups else 0.0,
+                "size": len(self._query_cache)
+            }
+    
+    def clear_query_cache(self):
+        """Drop cached query embeddings (e.g. after a model change)."""
+        with self._query_cache_lock:
+            self._query_cache.clear()
+            self._query_cache_hits = 0
+            self._query_cache_misses = 0
+    
+    def _lookup_documents(self, faiss_ids, db_manager) -> Dict[int, tuple]:
+        """
+        Fetch search hits by FAISS_index with one $in query per collection.
+        
+        Returns:
+            {faiss_index: (collection, document)}; segments win over presets
+        """
+        wanted = {int(faiss_idx) for faiss_idx in faiss_ids if faiss_idx >= 0}
+        documents = {}
+        if not wanted:
+            return documents
+        
+        for segment in db_manager.segments.find(
+                {"FAISS_index": {"$in": list(wanted)}}, SEGMENT_SEARCH_FIELDS):
+            documents[segment["FAISS_index"]] = ("segments", segment)
+        
+        # Presets live in a separate collection; only look up what is left
+        remaining = wanted.difference(documents)
+        if remaining:
+            for preset in db_manager.presets.find(
+                    {"FAISS_index": {"$in": list(remaining)}}, PRESET_SEARCH_FIELDS):
+                documents[preset["FAISS_index"]] = ("presets", preset)
+        
+        return documents
+    
+    def _lookup_results(self, indices, scores, documents: Dict[int, tuple]) -> List[Dict[str, Any]]:
+        """Build one row of search results from prefetched documents."""
+        results = []
+        for faiss_idx, score in zip(indices, scores):
+            # Convert numpy.int64 to regular Python int (-1: HNSW found fewer than k)
+            hit = documents.get(int(faiss_idx))
+            if hit:
+                collection, document = hit
+                results.append({
+                    "collection": collection,
+                    "document": document,
+                    "score": float(score)
+                })
+        
+        return results
         
     def get_total_embeddings(self) -> int:
         """Get total number of embeddings."""
@@ -203,99 +585,101 @@ class EmbeddingManager:
         
         try:
             # Reset index
-            self.index = faiss.IndexFlatIP(self.embedding_dim)
+            self.index = self._create_index()
+            self._index_mapped = False
             self.next_id = 0
+            self.result_cache.clear()
+            self._cache_files_used = set()
             
-            # Process segments with hierarchical context
+            # Context documents are shared by many segments/presets, so load
+            # them once up front instead of one find_one per row
             if text_processor:
-                segments = db_manager.segments.find({})
-                for segment in segments:
+                recordings = self._context_lookup(db_manager.recordings, "path")
+                segmentations = self._context_lookup(db_manager.segmentations, "_id")
+                effects = self._context_lookup(db_manager.effects, "path")
+                text_processor.prime_keywords(
+                    [doc.get("description") for lookup in (recordings, segmentations, effects)
+                     for doc in lookup.values()]
+                )
+            
+            # Process segments with hierarchical context, one encode chunk at a time
+            segments = db_manager.segments.find(
+                {}, SEGMENT_REBUILD_FIELDS if text_processor else STORED_TEXT_REBUILD_FIELDS
+            ).batch_size(REBUILD_CURSOR_BATCH)
+            for chunk in _chunked(segments, REBUILD_ENCODE_CHUNK):
+                if text_processor:
+                    text_processor.prime_keywords([segment.get("description") for segment in chunk])
+                
+                pending = []
+                for segment in chunk:
                     try:
                         stats["segments_processed"] += 1
                         
-                        # Get context for hierarchical embedding (path-based lookup)
-                        recording = db_manager.get_recording_by_path(segment.get("source_path"))
-                        segmentation = db_manager.get_segmentation(segment.get("segmentation_id"))
-                        
-                        # Create hierarchical embedding text
-                        embedding_text = text_processor.create_segment_embedding_text(
-                            segment, recording, segmentation
-                        )
+                        if text_processor:
+                            # Get context for hierarchical embedding (path-based lookup)
+                            recording = recordings.get(segment.get("source_path"))
+                            segmentation = segmentations.get(segment.get("segmentation_id"))
+                            
+                            # Create hierarchical embedding text
+                            embedding_text = text_processor.create_segment_embedding_text(
+                                segment, recording, segmentation
+                            )
+                        else:
+                            # Fallback to existing embedding_text
+                            embedding_text = segment.get("embedding_text", "")
                         
                         if embedding_text:
-                            faiss_id = self.add_embedding(embedding_text)
-                            
-                            if faiss_id is not None:
-                                # Update segment with new FAISS_index and embedding_text
-                                db_manager.segments.update_one(
-                                    {"_id": segment["_id"]},
-                                    {"$set": {
-                                        "FAISS_index": faiss_id,
-                                        "embedding_text": embedding_text
-                                    }}
-                                )
-                                stats["segments_added"] += 1
+                            pending.append((segment, embedding_text))
                     
                     except Exception as e:
                         stats["errors"] += 1
                         logger.error(f"Failed to process segment {segment.get('_id', 'unknown')}: {e}")
+                
+                added, failed = self._flush_rebuild_chunk(
+                    db_manager.segments, pending, text_processor is not None
+                )
+                stats["segments_added"] += added
+                stats["errors"] += failed
             
-            else:
-                # Fallback to existing embedding_text
-                segments = db_manager.segments.find({})
-                for segment in segments:
+            # Process presets with hierarchical context (now separate collection)
+            presets = db_manager.presets.find(
+                {}, PRESET_REBUILD_FIELDS if text_processor else STORED_TEXT_REBUILD_FIELDS
+            ).batch_size(REBUILD_CURSOR_BATCH)
+            for chunk in _chunked(presets, REBUILD_ENCODE_CHUNK):
+                if text_processor:
+                    text_processor.prime_keywords([preset.get("description") for preset in chunk])
+                
+                pending = []
+                for preset in chunk:
                     try:
-                        stats["segments_processed"] += 1
+                        stats["presets_processed"] += 1
                         
-                        embedding_text = segment.get("embedding_text", "")
-                        if embedding_text:
-                            faiss_id = self.add_embedding(embedding_text)
+                        if text_processor:
+                            # Get effect context (path-based lookup)
+                            effect = effects.get(preset.get("effect_path"))
                             
-                            if faiss_id is not None:
-                                db_manager.segments.update_one(
-                                    {"_id": segment["_id"]},
-                                    {"$set": {"FAISS_index": faiss_id}}
-                                )
-                                stats["segments_added"] += 1
+                            # Create hierarchical embedding text
+                            embedding_text = text_processor.create_preset_embedding_text(preset, effect)
+                        else:
+                            # Fallback to existing embedding_text
+                            embedding_text = preset.get("embedding_text", "")
+                        
+                        if embedding_text:
+                            pending.append((preset, embedding_text))
                     
                     except Exception as e:
                         stats["errors"] += 1
-                        logger.error(f"Failed to process segment {segment.get('_id', 'unknown')}: {e}")
-            
-            # Process presets with hierarchical context (now separate collection)
-            presets = db_manager.presets.find({})
-            for preset in presets:
-                try:
-                    stats["presets_processed"] += 1
-                    
-                    if text_processor:
-                        # Get effect context (path-based lookup)
-                        effect = db_manager.get_effect_by_path(preset.get("effect_path"))
-                        
-                        # Create hierarchical embedding text
-                        embedding_text = text_processor.create_preset_embedding_text(preset, effect)
-                    else:
-                        # Fallback to existing embedding_text
-                        embedding_text = preset.get("embedding_text", "")
-                    
-                    if embedding_text:
-                        faiss_id = self.add_embedding(embedding_text)
-                        
-                        if faiss_id is not None:
-                            # Update preset with new FAISS_index and embedding_text
-                            update_data = {"FAISS_index": faiss_id}
-                            if text_processor:
-                                update_data["embedding_text"] = embedding_text
-                            
-                            db_manager.presets.update_one(
-                                {"_id": preset["_id"]},
-                                {"$set": update_data}
-                            )
-                            stats["presets_added"] += 1
+                        logger.error(f"Failed to process preset {preset.get('_id', 'unknown')}: {e}")
                 
-                except Exception as e:
-                    stats["errors"] += 1
-                    logger.error(f"Failed to process preset {preset.get('_id', 'unknown')}: {e}")
+                added, failed = self._flush_rebuild_chunk(
+                    db_manager.presets, pending, text_processor is not None
+                )
+                stats["presets_added"] += added
+                stats["errors"] += failed
+            
+            # Single write of the rebuilt index
+            self._save_index()
+            self._prune_embedding_cache()
             
             logger.info(f"Index rebuild complete: {stats}")
             return stats
@@ -304,5 +688,59 @@ class EmbeddingManager:
             logger.error(f"Index rebuild failed: {e}")
             stats["errors"] += 1
             return stats
-
     
+    def _context_lookup(self, collection, key_field: str) -> Dict[Any, Dict[str, Any]]:
+        """Map key_field -> document (description only) for a context collection."""
+        cursor = collection.find(
+            {}, {key_field: 1, "description": 1}
+        ).batch_size(REBUILD_CURSOR_BATCH)
+        return {doc.get(key_field): doc for doc in cursor}
+    
+    def _flush_rebuild_chunk(self, collection, pending: List[tuple],
+                             store_text: bool) -> Tuple[int, int]:
+        """
+        Embed a chunk of (document, embedding_text) pairs and record the
+        new FAISS indices in MongoDB. Documents that already hold the same
+        FAISS_index and embedding_text are not rewritten.
+        
+        Returns:
+            (added, failed): documents successfully embedded, and documents
+            whose FAISS_index could not be stored
+        """
+        if not pending:
+            return 0, 0
+        
+        faiss_ids = self.add_embeddings_batch([text for _, text in pending], save=False,
+                                              use_cache=True)
+        
+        operations = []
+        unchanged = 0
+        for (doc, embedding_text), faiss_id in zip(pending, faiss_ids):
+            if faiss_id is None:
+                continue
+            
+            if (doc.get("FAISS_index") == faiss_id and
+                    (not store_text or doc.get("embedding_text") == embedding_text)):
+                unchanged += 1
+                continue
+            
+            update_data = {"FAISS_index": faiss_id}
+            if store_text:
+                update_data["embedding_text"] = embedding_text
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": update_data}))
+        
+        if not operations:
+            return unchanged, 0
+        
+        # One round-trip for the whole chunk; rejected or unmatched updates
+        # count as failures
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            matched = result.matched_count
+        except BulkWriteError as e:
+            logger.error(f"Failed to store some FAISS indices: {e.details.get('writeErrors')}")
+            matched = e.details.get("nMatched", 0)
+        except Exception as e:
+            logger.error(f"Failed to store FAISS indices: {e}")
+            matched = 0
+        return unchanged + matched, len(operations) - matched
@@ -21,7 +21,7 @@ from .database_manager import HibikidoDatabase
 from .embedding_manager import EmbeddingManager
 from .text_processor import TextProcessor
 from .osc_handler import OSCHandler
-from .orchestrator import Orchestrator
+from .orchestrator import Orchestrator, ManifestationRequest
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +30,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Filler words left out of display descriptions
+DISPLAY_SKIP_WORDS = frozenset({'the', 'and', 'for', 'with'})
+
 class HibikidoServer:
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or self._default_config()
@@ -42,7 +45,8 @@ class HibikidoServer:
         
         self.embedding_manager = EmbeddingManager(
             model_name=self.config['embedding']['model_name'],
-            index_file=self.config['embedding']['index_file']
+            index_file=self.config['embedding']['index_file'],
+            mmap_index=self.config['embedding'].get('mmap_index', False)
         )
         
         self.text_processor = TextProcessor()
@@ -72,7 +76,8 @@ class HibikidoServer:
             },
             'embedding': {
                 'model_name': 'all-MiniLM-L6-v2',
-                'index_file': 'hibikido.index'
+                'index_file': 'hibikido.index',
+                'mmap_index': False
             },
             'osc': {
                 'listen_ip': '127.0.0.1',
@@ -247,32 +252,24 @@ class HibikidoServer:
             for i, result in enumerate(segment_results):
                 document = result["document"]
                 
-                # Extract metadata for orchestrator
-                freq_low = document.get("freq_low", 200)
-                freq_high = document.get("freq_high", 2000)
-                duration = document.get("duration", 1.0)
-                sound_id = str(document.get("_id", "unknown"))
-                
-                # Prepare manifestation data
-                manifestation_data = {
-                    "index": i,
-                    "collection": "segments",
-                    "score": float(result["score"]),
-                    "path": str(document.get("source_path", "")),
-                    "description": self._create_display_description(
-                        document.get("embedding_text", "")
-                    ),
-                    "start": float(document.get("start", 0.0)),
-                    "end": float(document.get("end", 1.0)),
-                    "parameters": "[]",  # Empty for segments
-                    "sound_id": sound_id,
-                    "freq_low": freq_low,
-                    "freq_high": freq_high,
-                    "duration": duration
-                }
+                # Prepare manifestation request with orchestrator metadata
+                request = ManifestationRequest(
+                    i,
+                    "segments",
+                    float(result["score"]),
+                    str(document.get("source_path", "")),
+                    self._create_display_description(document.get("embedding_text", "")),
+                    float(document.get("start", 0.0)),
+                    float(document.get("end", 1.0)),
+                    "[]",  # Empty for segments
+                    str(document.get("_id", "unknown")),
+                    document.get("freq_low", 200),
+                    document.get("freq_high", 2000),
+                    document.get("duration", 1.0)
+                )
                 
                 # Queue for orchestrator (no immediate manifestation)
-                if self.orchestrator.queue_manifestation(manifestation_data):
+                if self.orchestrator.queue_manifestation(request):
                     queued_count += 1
             
             # Simple confirmation - no completion signal
@@ -290,14 +287,14 @@ class HibikidoServer:
             if not embedding_text:
                 return "untitled"
             
-            # Simple processing for performance
-            words = embedding_text.split()
+            # Simple processing for performance: only the first 8 words are used
+            words = embedding_text.split(None, 8)[:8]
             
             # Take first few meaningful words
             meaningful_words = []
-            for word in words[:8]:
-                word = word.strip().lower()
-                if len(word) > 2 and word not in ['the', 'and', 'for', 'with']:
+            for word in words:
+                word = word.lower()
+                if len(word) > 2 and word not in DISPLAY_SKIP_WORDS:
                     meaningful_words.append(word)
                 if len(meaningful_words) >= 4:
                     break
@@ -433,7 +430,11 @@ class HibikidoServer:
                 self.osc_handler.send_error("invalid metadata JSON")
                 return
             
-            name = metadata.get('name', path.split('/')[-1].split('.')[0])
+            if 'name' in metadata:
+                name = metadata['name']
+            else:
+                # Default name: file name up to its first dot
+                name = path.rpartition('/')[2].partition('.')[0]
             description = metadata.get('description', f"Effect: {name}")
             
             success = self.db_manager.add_effect(
@@ -9,28 +9,210 @@ All results go through the queue - orchestrator decides when to manifest.
 import time
 import math
 import json
+import sys
+import threading
+import bisect
+from collections import deque
+import numpy as np
 from typing import Dict, List, Any, Optional, Callable
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Scheduling clock: integer nanoseconds, immune to wall-clock (NTP) jumps
+_now = time.monotonic_ns
+NS_PER_SECOND = 1_000_000_000
+
+# Active niche table columns: log2 frequency bounds, end/start time (monotonic ns)
+# and the original frequency bounds
+NICHE_COLUMNS = {"log_low": np.float64, "log_high": np.float64, "end": np.int64,
+                 "start": np.int64, "freq_low": np.float64, "freq_high": np.float64}
+NICHE_INITIAL_CAPACITY = 64
+# _next_expiry when no niche is active
+NO_EXPIRY = 2**63 - 1
+
+def _conflict_mask_numpy(q_low: np.ndarray, q_high: np.ndarray, log_low: np.ndarray,
+                         log_high: np.ndarray, threshold: float) -> np.ndarray:
+    """Conflict flag per query band: broadcast, queries along rows and niches along columns."""
+    q_low, q_high = q_low[:, None], q_high[:, None]
+    overlap = np.minimum(log_high, q_high) - np.maximum(log_low, q_low)
+    smaller_range = np.minimum(log_high - log_low, q_high - q_low)
+    conflicts = (overlap > 0) & (smaller_range > 0) & (overlap > threshold * smaller_range)
+    return conflicts.any(axis=1)
+
+
+def _conflict_mask_loops(q_low: np.ndarray, q_high: np.ndarray, log_low: np.ndarray,
+                         log_high: np.ndarray, threshold: float) -> np.ndarray:
+    """Same result as _conflict_mask_numpy, as loops for numba (no K x N temporaries)."""
+    mask = np.zeros(q_low.shape[0], dtype=np.bool_)
+    for i in range(q_low.shape[0]):
+        q_range = q_high[i] - q_low[i]
+        for j in range(log_low.shape[0]):
+            overlap = min(log_high[j], q_high[i]) - max(log_low[j], q_low[i])
+            smaller_range = min(log_high[j] - log_low[j], q_range)
+            if overlap > 0 and smaller_range > 0 and overlap > threshold * smaller_range:
+                mask[i] = True
+                break
+    return mask
+
+
+_conflict_kernel = None
+
+
+def _load_conflict_kernel() -> Callable:
+    """
+    Pick the conflict kernel once per process: the numba-compiled loops,
+    compiled (or loaded from numba's cache) and run once here so no JIT
+    happens inside a scheduling tick, or the NumPy broadcast if numba is
+    missing or fails in any way.
+    """
+    global _conflict_kernel
+    if _conflict_kernel is None:
+        try:
+            from numba import njit
+            kernel = njit(cache=True)(_conflict_mask_loops)
+            probe = np.zeros(1, dtype=np.float64)
+            kernel(probe, probe, probe, probe, 0.2)
+            _conflict_kernel = kernel
+            logger.info("numba available, using compiled conflict kernel")
+        except ImportError:
+            _conflict_kernel = _conflict_mask_numpy
+        except Exception as e:
+            logger.warning(f"numba conflict kernel failed, using NumPy: {e}")
+            _conflict_kernel = _conflict_mask_numpy
+    return _conflict_kernel
+
+
+def _conflict_mask(q_low: np.ndarray, q_high: np.ndarray, log_low: np.ndarray,
+                   log_high: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Conflict flag for each query log2 band against every niche band.
+    
+    Uses the numba-compiled loop kernel when available (see
+    _load_conflict_kernel), otherwise the NumPy broadcast. A compiled kernel
+    that fails at call time is dropped for good in favour of NumPy.
+    """
+    global _conflict_kernel
+    kernel = _load_conflict_kernel()
+    if kernel is _conflict_mask_numpy:
+        return kernel(q_low, q_high, log_low, log_high, threshold)
+    try:
+        return kernel(q_low, q_high, log_low, log_high, threshold)
+    except Exception as e:
+        logger.warning(f"Compiled conflict kernel failed, falling back to NumPy: {e}")
+        _conflict_kernel = _conflict_mask_numpy
+        return _conflict_mask_numpy(q_low, q_high, log_low, log_high, threshold)
+
+
+class ManifestationRequest:
+    """A search result waiting for a free time-frequency niche (slotted: no per-instance dict)."""
+    
+    __slots__ = ("index", "collection", "score", "path", "description", "start", "end",
+                 "parameters", "sound_id", "freq_low", "freq_high", "duration",
+                 "log_low", "log_high")
+    
+    def __init__(self, index: int, collection: str, score: float, path: str,
+                 description: str, start: float, end: float, parameters: str = "[]",
+                 sound_id: str = "unknown", freq_low: float = 200.0,
+                 freq_high: float = 2000.0, duration: float = 1.0):
+        self.index = index
+        # Few distinct values across many requests: share one string object each
+        self.collection = sys.intern(collection) if type(collection) is str else collection
+        self.score = score
+        self.path = path
+        self.description = description
+        self.start = start
+        self.end = end
+        self.parameters = sys.intern(parameters) if type(parameters) is str else parameters
+        self.sound_id = sound_id
+        self.freq_low = float(freq_low)
+        self.freq_high = float(freq_high)
+        self.duration = float(duration)
+        # log2 band, computed once here rather than on every conflict check
+        self.log_low = math.log2(max(self.freq_low, 1))
+        self.log_high = math.log2(max(self.freq_high, 1))
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ManifestationRequest":
+        """Build from a manifestation_data dict (orchestrator defaults for missing metadata)."""
+        return cls(
+            data["index"], data["collection"], data["score"], data["path"],
+            data["description"], data["start"], data["end"],
+            data.get("parameters", "[]"),
+            data.get("sound_id", "unknown"),
+            data.get("freq_low", 200),
+            data.get("freq_high", 2000),
+            data.get("duration", 1.0)
+        )
+    
+    def __repr__(self) -> str:
+        return (f"ManifestationRequest({self.sound_id!r}, "
+                f"{self.freq_low:.0f}-{self.freq_high:.0f}Hz, {self.duration}s)")
+
+
 class Orchestrator:
-    def __init__(self, overlap_threshold: float = 0.2, time_precision: float = 0.1):
+    def __init__(self, overlap_threshold: float = 0.2, time_precision: float = 0.1,
+                 clock: Optional[Callable[[], int]] = None):
         """
         Initialize orchestrator.
         
         Args:
             overlap_threshold: Maximum allowed logarithmic frequency overlap (0.2 = 20%)
             time_precision: Time precision in seconds (0.1 = 100ms)
+            clock: Returns the current time in integer nanoseconds (default:
+                time.monotonic_ns); tests inject a manually advanced clock
         """
+        self._clock = clock or _now
+        # Compile the conflict kernel now rather than on the first busy update()
+        _load_conflict_kernel()
         self.overlap_threshold = overlap_threshold
         self.time_precision = time_precision
         
-        # Active niches: list of dicts with sound_id, start_time, end_time, freq_low, freq_high
-        self.active_niches = []
+        # Active niches as structure-of-arrays: one contiguous array per
+        # NICHE_COLUMNS entry, valid for the first _n_niches rows, so conflict
+        # scans and expiry sweeps read only the columns they need; _niche_ids
+        # holds the row-aligned sound_ids
+        self._niches = {name: np.empty(NICHE_INITIAL_CAPACITY, dtype=dtype)
+                        for name, dtype in NICHE_COLUMNS.items()}
+        self._niche_ids = []
+        self._n_niches = 0
+        
+        # Zero-width (or inverted) niches in log-frequency space can never
+        # conflict, so they stay out of the scan table entirely
+        self._point_niches = []
+        
+        # Earliest end_time over all active niches (a lower bound after cancels),
+        # so _cleanup_expired is O(1) while nothing has expired
+        self._next_expiry = NO_EXPIRY
         
-        # Queue for manifestations: list of (manifestation_data, request_time)
-        self.queue = []
+        # Queue for manifestations: deque of (ManifestationRequest, request_time in monotonic ns).
+        # Producers (e.g. the OSC thread) only append on the right; update()
+        # pops a snapshot from the left and puts survivors back with extendleft,
+        # so the deque is never swapped out from under a concurrent append
+        self.queue = deque()
+        
+        # Guards _sound_counts, _cancelled and _may_have_duplicates, which
+        # both producer and update() threads modify
+        self._lock = threading.Lock()
+        
+        # sound_id -> number of queued requests plus active niches, for O(1) contains()
+        self._sound_counts: Dict[str, int] = {}
+        
+        # sound_id -> requests queued again after it was cancelled, for sounds
+        # cancelled since the last update(); swept out lazily there, sparing
+        # the requests queued after the cancel
+        self._cancelled: Dict[str, set] = {}
+        
+        # Set when a sound is queued while already tracked, so update() only
+        # coalesces the queue when it may hold duplicates
+        self._may_have_duplicates = False
+        
+        # Only freed niches or new requests can let a queued sound through, so a
+        # queue pass is skipped while (_niche_removals, _queued_total) still
+        # equals the state the last pass ran against
+        self._niche_removals = 0
+        self._queued_total = 0
+        self._last_pass_state = None
         
         # Callback for sending manifestations
         self.manifest_callback = None
@@ -38,17 +220,90 @@ class Orchestrator:
         logger.info(f"Orchestrator initialized: {overlap_threshold*100:.0f}% overlap threshold, "
                    f"{time_precision*1000:.0f}ms precision")
     
+    @property
+    def active_niches(self) -> List[Dict[str, Any]]:
+        """Active niche dicts (built from the table), earliest end_time first."""
+        n = self._n_niches
+        niches = [
+            {"sound_id": sound_id, "start_time": start_time, "end_time": end_time,
+             "freq_low": freq_low, "freq_high": freq_high}
+            for sound_id, start_time, end_time, freq_low, freq_high in zip(
+                self._niche_ids, self._niches["start"][:n].tolist(),
+                self._niches["end"][:n].tolist(), self._niches["freq_low"][:n].tolist(),
+                self._niches["freq_high"][:n].tolist())
+        ]
+        return sorted(niches + self._point_niches, key=lambda niche: niche["end_time"])
+    
+    def contains(self, sound_id: str) -> bool:
+        """True if sound_id is queued or currently playing in an active niche."""
+        requeued = self._cancelled.get(sound_id)
+        return sound_id in self._sound_counts and (requeued is None or bool(requeued))
+    
+    def cancel(self, sound_id: str) -> bool:
+        """
+        Cancel a queued or playing sound. O(1): its queue entries and niche
+        are removed on the next update().
+        
+        Returns:
+            True if sound_id was queued or active
+        """
+        with self._lock:
+            if not self.contains(sound_id):
+                return False
+            self._cancelled[sound_id] = set()
+            return True
+    
+    def _track(self, sound_id: str, request: Optional[ManifestationRequest] = None) -> bool:
+        """
+        Count one more queued request (when request is given) or niche for
+        sound_id; True if it was already tracked.
+        """
+        with self._lock:
+            requeued = self._cancelled.get(sound_id)
+            if request is not None and requeued is not None:
+                # Queued after a pending cancel: the sweep must not drop it
+                requeued.add(request)
+            count = self._sound_counts.get(sound_id, 0)
+            self._sound_counts[sound_id] = count + 1
+            return count > 0
+    
+    def _mark_queued(self, duplicate: bool):
+        """
+        Record an arrival once its entry is in the queue, so an update() that
+        sees the new _queued_total can also see the entry.
+        """
+        with self._lock:
+            self._queued_total += 1
+            if duplicate:
+                self._may_have_duplicates = True
+    
+    def _untrack(self, sound_id: str):
+        with self._lock:
+            remaining = self._sound_counts.get(sound_id, 0) - 1
+            if remaining > 0:
+                self._sound_counts[sound_id] = remaining
+            else:
+                self._sound_counts.pop(sound_id, None)
+    
+    def _take_queue(self) -> List[tuple]:
+        """Pop the entries queued so far; producers may keep appending meanwhile."""
+        return [self.queue.popleft() for _ in range(len(self.queue))]
+    
+    def _return_to_queue(self, entries: List[tuple]):
+        """Put entries back in order, ahead of anything queued since _take_queue."""
+        self.queue.extendleft(reversed(entries))
+    
     def set_manifest_callback(self, callback: Callable):
         """Set callback function for sending manifestations."""
         self.manifest_callback = callback
     
-    def queue_manifestation(self, manifestation_data: Dict[str, Any]) -> bool:
+    def queue_manifestation(self, manifestation_data) -> bool:
         """
         Queue a manifestation for orchestrator processing.
         All search results go through here - no immediate manifestations.
         
         Args:
-            manifestation_data: {
+            manifestation_data: ManifestationRequest, or a dict with the same keys: {
                 "index": int, "collection": str, "score": float,
                 "path": str, "description": str, "start": float, "end": float,
                 "parameters": str, "sound_id": str, "freq_low": float, 
@@ -59,14 +314,17 @@ class Orchestrator:
             True if queued successfully
         """
         try:
-            request_time = time.time()
-            self.queue.append((manifestation_data, request_time))
+            if isinstance(manifestation_data, ManifestationRequest):
+                request = manifestation_data
+            else:
+                request = ManifestationRequest.from_dict(manifestation_data)
             
-            sound_id = manifestation_data.get("sound_id", "unknown")
-            freq_low = manifestation_data.get("freq_low", 200)
-            freq_high = manifestation_data.get("freq_high", 2000)
+            duplicate = self._track(request.sound_id, request)
+            self.queue.append((request, self._clock()))
+            self._mark_queued(duplicate)
             
-            logger.debug(f"Queued manifestation: {sound_id} [{freq_low:.0f}-{freq_high:.0f}Hz]")
+            logger.debug(f"Queued manifestation: {request.sound_id} "
+                         f"[{request.freq_low:.0f}-{request.freq_high:.0f}Hz]")
             return True
             
         except Exception as e:
@@ -79,9 +337,13 @@ class Orchestrator:
         This is where manifestations actually get sent.
         """
         try:
-            # Clean up expired niches
+            # Sweep out cancelled sounds, then expired niches
+            self._drop_cancelled()
             self._cleanup_expired()
             
+            # Collapse repeated requests so each is conflict-checked once
+            self._coalesce_queue()
+            
             # Process queue - try to manifest waiting sounds
             self._process_queue()
             
@@ -90,78 +352,166 @@ class Orchestrator:
     
     def _process_queue(self):
         """Process the manifestation queue - send manifestations when niches are free."""
-        if not self.queue or not self.manifest_callback:
+        callback = self.manifest_callback
+        if not self.queue or not callback:
+            return
+        
+        # Nothing freed and nothing new since the last pass: all still blocked
+        state = (self._niche_removals, self._queued_total)
+        if state == self._last_pass_state:
             return
         
-        now = time.time()
-        remaining_queue = []
+        now = self._clock()
         manifestations_sent = 0
         
-        # Process queue in FIFO order
-        for manifestation_data, request_time in self.queue:
+        # Conflicts with the niches active before this pass, for the whole queue
+        # at once; each request then only checks niches registered during the
+        # pass, kept as (log_low, log_high, end_time) sorted by log_low
+        pass_bands = []
+        pending = self._take_queue()
+        try:
+            blocked_by_existing = self._queue_conflicts(pending, now)
+        except Exception:
+            self._return_to_queue(pending)
+            raise
+        
+        # Process queue in FIFO order; requests still blocked go back to the front.
+        # Bound methods and the debug check are hoisted out of the loop
+        any_conflict = self._any_conflict
+        register_niche = self._register_niche
+        untrack = self._untrack
+        insort = bisect.insort
+        debug = logger.isEnabledFor(logging.DEBUG)
+        still_queued = []
+        still_queued_append = still_queued.append
+        for (request, request_time), blocked in zip(pending, blocked_by_existing):
             try:
-                # Extract frequency/duration info
-                sound_id = manifestation_data.get("sound_id", "unknown")
-                freq_low = float(manifestation_data.get("freq_low", 200))
-                freq_high = float(manifestation_data.get("freq_high", 2000))
-                duration = float(manifestation_data.get("duration", 1.0))
-                
                 # Check for conflicts
-                conflict_end_time = self._find_conflict(freq_low, freq_high, now)
+                if not blocked:
+                    blocked = any_conflict(request.log_low, request.log_high, now,
+                                           pass_bands)
                 
-                if conflict_end_time is None:
+                if not blocked:
                     # No conflict - register niche and send manifestation
-                    self._register_niche(sound_id, now, now + duration, freq_low, freq_high)
+                    end_time = now + int(request.duration * NS_PER_SECOND)
+                    register_niche(request.sound_id, now, end_time,
+                                   request.freq_low, request.freq_high,
+                                   request.log_low, request.log_high)
+                    if request.log_high > request.log_low:
+                        insort(pass_bands, (request.log_low, request.log_high, end_time))
                     
                     # Send manifestation via callback
-                    self.manifest_callback(
-                        manifestation_data["index"],
-                        manifestation_data["collection"],
-                        manifestation_data["score"],
-                        manifestation_data["path"],
-                        manifestation_data["description"],
-                        manifestation_data["start"],
-                        manifestation_data["end"],
-                        manifestation_data["parameters"]
+                    callback(
+                        request.index,
+                        request.collection,
+                        request.score,
+                        request.path,
+                        request.description,
+                        request.start,
+                        request.end,
+                        request.parameters
                     )
                     
                     manifestations_sent += 1
-                    logger.debug(f"Manifested: {sound_id} [{freq_low:.0f}-{freq_high:.0f}Hz] "
-                               f"(queued for {now - request_time:.1f}s)")
+                    untrack(request.sound_id)  # Left the queue for its niche
+                    if debug:
+                        logger.debug(f"Manifested: {request.sound_id} "
+                                     f"[{request.freq_low:.0f}-{request.freq_high:.0f}Hz] "
+                                     f"(queued for {(now - request_time) / NS_PER_SECOND:.1f}s)")
                 else:
                     # Still has conflict - keep in queue
-                    remaining_queue.append((manifestation_data, request_time))
+                    still_queued_append((request, request_time))
                     
             except Exception as e:
                 logger.error(f"Failed to process queued manifestation: {e}")
                 # Drop this manifestation to avoid infinite loops
+                untrack(request.sound_id)
         
-        # Update queue with remaining items
-        self.queue = remaining_queue
+        self._return_to_queue(still_queued)
+        self._last_pass_state = state
         
         if manifestations_sent > 0:
             logger.debug(f"Processed queue: {manifestations_sent} manifestations sent, "
                         f"{len(self.queue)} still queued")
     
-    def _find_conflict(self, freq_low: float, freq_high: float, now: float) -> Optional[float]:
+    def _coalesce_queue(self):
+        """
+        Merge queued requests for the same sound and frequency range.
+        
+        The entry keeps its first queue position and request time, and takes
+        the most recently queued parameters.
+        """
+        with self._lock:
+            if not self._may_have_duplicates:
+                return
+            self._may_have_duplicates = False
+        
+        pending = self._take_queue()
+        merged = {}
+        for request, request_time in pending:
+            key = (request.sound_id, request.freq_low, request.freq_high)
+            previous = merged.get(key)
+            if previous is None:
+                merged[key] = (request, request_time)
+            else:
+                merged[key] = (request, previous[1])
+                self._untrack(request.sound_id)
+        
+        self._return_to_queue(list(merged.values()))
+        if len(merged) < len(pending):
+            logger.debug(f"Coalesced {len(pending) - len(merged)} duplicate queued requests")
+    
+    def _queue_conflicts(self, entries: List[tuple], now: int) -> np.ndarray:
         """
-        Find if frequency range conflicts with active niches.
+        Check queued (request, request_time) entries against the active niches in one broadcast.
         
         Returns:
-            None if no conflict, otherwise the end_time of the earliest conflicting niche
+            Boolean array aligned with entries, True where a request conflicts
         """
-        earliest_conflict_end = None
+        if not self._n_niches or not entries:
+            return np.zeros(len(entries), dtype=bool)
         
-        for niche in self.active_niches:
-            # Check time overlap (sound is still active)
-            if now < niche["end_time"]:
-                # Check logarithmic frequency overlap
-                if self._has_frequency_overlap(freq_low, freq_high, 
-                                             niche["freq_low"], niche["freq_high"]):
-                    if earliest_conflict_end is None or niche["end_time"] < earliest_conflict_end:
-                        earliest_conflict_end = niche["end_time"]
+        n = self._n_niches
+        live = self._niches["end"][:n] > now
+        log_low = self._niches["log_low"][:n][live]
+        log_high = self._niches["log_high"][:n][live]
         
-        return earliest_conflict_end
+        # Requests often share a band (same sound or analysis preset), so test
+        # each distinct band once and map the answers back to the entries
+        band_rows = {}
+        rows = [band_rows.setdefault((request.log_low, request.log_high), len(band_rows))
+                for request, _ in entries]
+        count = len(band_rows)
+        q_low = np.fromiter((band[0] for band in band_rows), dtype=np.float64, count=count)
+        q_high = np.fromiter((band[1] for band in band_rows), dtype=np.float64, count=count)
+        
+        band_conflicts = _conflict_mask(q_low, q_high, log_low, log_high,
+                                        float(self.overlap_threshold))
+        return band_conflicts[np.array(rows, dtype=np.intp)]
+    
+    def _any_conflict(self, q_low: float, q_high: float, now: int,
+                      bands: List[tuple]) -> bool:
+        """
+        True as soon as one (log_low, log_high, end_time) band conflicts with the log2 band.
+        
+        bands must be sorted by log_low: only bands starting below q_high can
+        overlap, so those are found with a bisect and scanned, short-circuiting.
+        Scalar, for the few niches registered during a queue pass, where
+        per-call NumPy overhead would dominate.
+        """
+        q_range = q_high - q_low
+        threshold = self.overlap_threshold
+        
+        candidates = bisect.bisect_left(bands, (q_high,))
+        for i in range(candidates):
+            log_low, log_high, end_time = bands[i]
+            if log_high <= q_low or end_time <= now:
+                continue
+            overlap = min(log_high, q_high) - max(log_low, q_low)
+            smaller_range = min(log_high - log_low, q_range)
+            if overlap > 0 and smaller_range > 0 and overlap > threshold * smaller_range:
+                return True
+        return False
     
     def _has_frequency_overlap(self, f1_low: float, f1_high: float, 
                               f2_low: float, f2_high: float) -> bool:
@@ -177,58 +527,152 @@ class Orchestrator:
             log_f2_low = math.log2(max(f2_low, 1))
             log_f2_high = math.log2(max(f2_high, 1))
             
-            # Calculate ranges in log space
-            range1_size = log_f1_high - log_f1_low
-            range2_size = log_f2_high - log_f2_low
-            
-            # Find overlap region
-            overlap_start = max(log_f1_low, log_f2_low)
-            overlap_end = min(log_f1_high, log_f2_high)
-            
-            if overlap_start >= overlap_end:
+            # Overlap region in log space; most pairs don't overlap at all
+            overlap_size = min(log_f1_high, log_f2_high) - max(log_f1_low, log_f2_low)
+            if overlap_size <= 0:
                 return False  # No overlap
             
-            overlap_size = overlap_end - overlap_start
-            
-            # Check if overlap exceeds threshold relative to smaller range
-            smaller_range = min(range1_size, range2_size)
-            if smaller_range <= 0:
-                return False
-            
-            overlap_ratio = overlap_size / smaller_range
+            # overlap / smaller range > threshold, as a multiply (no division)
+            smaller_range = min(log_f1_high - log_f1_low, log_f2_high - log_f2_low)
+            return smaller_range > 0 and overlap_size > self.overlap_threshold * smaller_range
             
-            return overlap_ratio > self.overlap_threshold
-            
-        except (ValueError, ZeroDivisionError):
+        except ValueError:
             # Handle edge cases
             return False
     
-    def _register_niche(self, sound_id: str, start_time: float, end_time: float,
-                       freq_low: float, freq_high: float):
-        """Register a new active niche."""
-        niche = {
-            "sound_id": sound_id,
-            "start_time": start_time,
-            "end_time": end_time,
-            "freq_low": freq_low,
-            "freq_high": freq_high
-        }
-        self.active_niches.append(niche)
+    def _register_niche(self, sound_id: str, start_time: int, end_time: int,
+                       freq_low: float, freq_high: float,
+                       log_low: Optional[float] = None, log_high: Optional[float] = None):
+        """
+        Register a new active niche (times in clock ns, see _now).
+        
+        log_low/log_high may be passed when already known (ManifestationRequest).
+        """
+        if log_low is None:
+            log_low = math.log2(max(freq_low, 1))
+        if log_high is None:
+            log_high = math.log2(max(freq_high, 1))
+        self._track(sound_id)
+        self._next_expiry = min(self._next_expiry, end_time)
+        
+        if log_high <= log_low:
+            self._point_niches.append({
+                "sound_id": sound_id,
+                "start_time": start_time,
+                "end_time": end_time,
+                "freq_low": freq_low,
+                "freq_high": freq_high
+            })
+            return
+        
+        row = self._n_niches
+        if row == len(self._niches["end"]):
+            # Full: double the capacity of every column
+            for name, column in self._niches.items():
+                grown = np.empty(2 * len(column), dtype=column.dtype)
+                grown[:row] = column[:row]
+                self._niches[name] = grown
+        
+        columns = self._niches
+        columns["log_low"][row] = log_low
+        columns["log_high"][row] = log_high
+        columns["end"][row] = end_time
+        columns["start"][row] = start_time
+        columns["freq_low"][row] = freq_low
+        columns["freq_high"][row] = freq_high
+        self._niche_ids.append(sound_id)
+        self._n_niches += 1
     
     def _cleanup_expired(self):
-        """Remove expired niches."""
-        now = time.time()
+        """Remove expired niches with one vectorized sweep, compacting the table."""
+        now = self._clock()
+        if now < self._next_expiry:
+            return
+        
+        expired = self._compact_niches(self._niches["end"][:self._n_niches] > now)
+        expired += self._sweep_point_niches(lambda niche: niche["end_time"] > now)
         
-        before_count = len(self.active_niches)
-        self.active_niches = [n for n in self.active_niches if n["end_time"] > now]
+        self._next_expiry = min([niche["end_time"] for niche in self._point_niches],
+                                default=NO_EXPIRY)
+        if self._n_niches:
+            self._next_expiry = min(self._next_expiry,
+                                    int(self._niches["end"][:self._n_niches].min()))
+        if expired:
+            logger.debug(f"Cleaned up {expired} expired niches")
+    
+    def _drop_cancelled(self):
+        """Remove queued requests and active niches of cancelled sounds."""
+        if not self._cancelled:
+            return
+        
+        # Sweep a copy: sounds cancelled meanwhile are handled next update. The
+        # requeued sets are read live, as a request is added before it is enqueued
+        with self._lock:
+            cancelled = dict(self._cancelled)
+        
+        pending = self._take_queue()
+        remaining = []
+        for request, request_time in pending:
+            requeued = cancelled.get(request.sound_id)
+            if requeued is not None and request not in requeued:
+                self._untrack(request.sound_id)
+            else:
+                remaining.append((request, request_time))
+        self._return_to_queue(remaining)
+        dropped = len(pending) - len(remaining)
+        
+        if self._n_niches:
+            keep = np.fromiter((sound_id not in cancelled for sound_id in self._niche_ids),
+                               dtype=bool, count=self._n_niches)
+            dropped += self._compact_niches(keep)
+        dropped += self._sweep_point_niches(lambda niche: niche["sound_id"] not in cancelled)
+        
+        logger.debug(f"Dropped {dropped} entries for {len(cancelled)} cancelled sounds")
+        with self._lock:
+            for sound_id, requeued in cancelled.items():
+                # Unless cancelled again meanwhile
+                if self._cancelled.get(sound_id) is requeued:
+                    del self._cancelled[sound_id]
+    
+    def _sweep_point_niches(self, keep: Callable[[Dict[str, Any]], bool]) -> int:
+        """Keep only the point niches where keep(niche) is True; returns the number removed."""
+        if not self._point_niches:
+            return 0
+        
+        kept_points = []
+        for niche in self._point_niches:
+            if keep(niche):
+                kept_points.append(niche)
+            else:
+                self._untrack(niche["sound_id"])
+        removed = len(self._point_niches) - len(kept_points)
+        self._point_niches = kept_points
+        return removed
+    
+    def _compact_niches(self, keep: np.ndarray) -> int:
+        """Keep only the niche rows where keep is True; returns the number removed."""
+        kept = int(np.count_nonzero(keep))
+        removed = self._n_niches - kept
+        
+        if removed:
+            self._niche_removals += 1
+            for column in self._niches.values():
+                column[:kept] = column[:self._n_niches][keep]
+            kept_ids = []
+            for sound_id, alive in zip(self._niche_ids, keep):
+                if alive:
+                    kept_ids.append(sound_id)
+                else:
+                    self._untrack(sound_id)
+            self._niche_ids = kept_ids
+            self._n_niches = kept
         
-        if len(self.active_niches) < before_count:
-            logger.debug(f"Cleaned up {before_count - len(self.active_niches)} expired niches")
+        return removed
     
     def get_stats(self) -> Dict[str, Any]:
         """Get orchestrator statistics."""
         return {
-            "active_niches": len(self.active_niches),
+            "active_niches": self._n_niches + len(self._point_niches),
             "queued_requests": len(self.queue),
             "overlap_threshold": self.overlap_threshold,
             "time_precision": self.time_precision
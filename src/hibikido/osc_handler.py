@@ -15,6 +15,10 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# First characters a JSON document can start with; anything else is plain text
+# and can skip the json.loads attempt (and its exception) entirely
+_JSON_START_CHARS = frozenset('{["-0123456789tfnNI')
+
 class OSCHandler:
     def __init__(self, listen_ip: str = "127.0.0.1", listen_port: int = 9000,
                  send_ip: str = "127.0.0.1", send_port: int = 9001):
@@ -131,10 +135,16 @@ class OSCHandler:
             parsed['arg2'] = str(args[1]) if args[1] is not None else ""
         if len(args) >= 3:
             # Try to parse third argument as JSON
-            try:
-                parsed['arg3'] = json.loads(str(args[2])) if args[2] else {}
-            except (json.JSONDecodeError, TypeError):
-                parsed['arg3'] = str(args[2]) if args[2] is not None else ""
+            if not args[2]:
+                parsed['arg3'] = {}
+            else:
+                text = str(args[2])
+                parsed['arg3'] = text
+                if text.lstrip()[:1] in _JSON_START_CHARS:
+                    try:
+                        parsed['arg3'] = json.loads(text)
+                    except json.JSONDecodeError:
+                        pass
         
         # Add all remaining args
         if len(args) > 3:
@@ -8,11 +8,31 @@ Target: 15 words, hard limit: 20 words
 """
 
 import re
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Cleaning pattern: runs of non-word characters (punctuation and whitespace alike)
+_RE_NORM = re.compile(r'\W+')
+# ASCII fast path: map every non-word ASCII character to a space in C
+_CLEAN_TABLE = str.maketrans({chr(c): ' ' for c in range(128) if _RE_NORM.match(chr(c))})
+
+# Descriptions repeat heavily across segments of one recording and across
+# rebuilds, so cleaning results are memoized for the life of the process
+CLEAN_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def _clean_text_cached(text: str) -> str:
+    """Lowercase and collapse non-word runs to single spaces."""
+    text = text.lower()
+    if text.isascii():
+        return ' '.join(text.translate(_CLEAN_TABLE).split())
+    return _RE_NORM.sub(' ', text).strip()
+
 # Try to import spaCy, fallback to simple processing if not available
 try:
     import spacy
@@ -23,13 +43,34 @@ except ImportError:
     logger.info("spaCy not available, using simple text processing")
 
 class TextProcessor:
+    # Standard English stop words for the simple (non-spaCy) extractor
+    _STOP_WORDS = frozenset({
+        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
+        'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+        'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+        'should', 'may', 'might', 'this', 'that', 'these', 'those'
+    })
+    
+    # Audio-specific stop words to remove (in addition to standard ones)
+    AUDIO_STOP_WORDS = frozenset({
+        'sound', 'audio', 'recording', 'sample', 'track', 'file', 'piece'
+    })
+    
+    _ALL_STOP_WORDS = _STOP_WORDS | AUDIO_STOP_WORDS
+    
+    # Context levels in priority order (local > broader) with per-level word limits
+    SEGMENT_CONTEXT_LIMITS = (("segment", 10), ("segmentation", 5), ("recording", 5))
+    PRESET_CONTEXT_LIMITS = (("preset", 12), ("effect", 8))
+    
     def __init__(self):
         self.nlp = None
         
         # Initialize spaCy if available
         if SPACY_AVAILABLE:
             try:
-                self.nlp = spacy.load("en_core_web_sm")
+                # Keyword extraction only needs tokens, stop flags and lemmas;
+                # the dependency parser and NER dominate per-doc cost otherwise
+                self.nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"])
                 logger.info("spaCy model loaded successfully")
             except OSError:
                 logger.warning("spaCy model 'en_core_web_sm' not found, falling back to simple processing")
@@ -40,10 +81,15 @@ class TextProcessor:
         else:
             self.spacy_working = False
         
-        # Audio-specific stop words to remove (in addition to standard ones)
-        self.audio_stop_words = {
-            'sound', 'audio', 'recording', 'sample', 'track', 'file', 'piece'
-        }
+        self.audio_stop_words = self.AUDIO_STOP_WORDS
+        
+        # Per-instance keyword cache (keyed on text and word limit); wrapping the
+        # bound method here keeps the cache from outliving this processor
+        self._keywords_cached = lru_cache(maxsize=CLEAN_CACHE_SIZE)(self._extract_keywords_uncached)
+        # Bounded LRU of full spaCy keyword lists by text, filled by
+        # prime_keywords() in batches or by single lookups; kept across
+        # rebuilds so unchanged descriptions are never piped again
+        self._spacy_keywords = OrderedDict()
     
     def create_segment_embedding_text(self, segment: Dict[str, Any], 
                                     recording: Dict[str, Any] = None,
@@ -54,29 +100,16 @@ class TextProcessor:
         """
         try:
             # Collect context in priority order
-            contexts = []
-            
-            # Priority 1: Segment description (local)
-            segment_desc = segment.get("description", "")
-            if segment_desc:
-                contexts.append(("segment", segment_desc, 10))  # Up to 10 words
-            
-            # Priority 2: Segmentation description (method context)
-            if segmentation:
-                seg_desc = segmentation.get("description", "")
-                if seg_desc:
-                    contexts.append(("segmentation", seg_desc, 5))  # Up to 5 words
-            
-            # Priority 3: Recording description (broader context)
-            if recording:
-                rec_desc = recording.get("description", "")
-                if rec_desc:
-                    contexts.append(("recording", rec_desc, 5))  # Up to 5 words
+            contexts = self._collect_contexts(
+                self.SEGMENT_CONTEXT_LIMITS, (segment, segmentation, recording)
+            )
             
             # Process and combine
             final_text = self._combine_contexts(contexts, target_words=15, max_words=20)
             
-            logger.debug(f"Segment embedding text: '{final_text}' for {segment.get('_id', 'unknown')}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Segment embedding text: '%s' for %s",
+                             final_text, segment.get('_id', 'unknown'))
             return final_text
             
         except Exception as e:
@@ -91,23 +124,14 @@ class TextProcessor:
         Priority: preset > effect
         """
         try:
-            contexts = []
-            
-            # Priority 1: Preset description (local)
-            preset_desc = preset.get("description", "")
-            if preset_desc:
-                contexts.append(("preset", preset_desc, 12))  # Up to 12 words
-            
-            # Priority 2: Effect description (broader context)
-            if effect:
-                effect_desc = effect.get("description", "")
-                if effect_desc:
-                    contexts.append(("effect", effect_desc, 8))  # Up to 8 words
+            contexts = self._collect_contexts(self.PRESET_CONTEXT_LIMITS, (preset, effect))
             
             # Process and combine
             final_text = self._combine_contexts(contexts, target_words=15, max_words=20)
             
-            logger.debug(f"Preset embedding text: '{final_text}' for preset in {effect.get('_id', 'unknown') if effect else 'unknown'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Preset embedding text: '%s' for preset in %s",
+                             final_text, effect.get('_id', 'unknown') if effect else 'unknown')
             return final_text
             
         except Exception as e:
@@ -115,6 +139,25 @@ class TextProcessor:
             # Fallback to just preset description
             return self._clean_text(preset.get("description", "effect preset"))
     
+    def _collect_contexts(self, limits: tuple, documents: tuple) -> List[tuple]:
+        """
+        Pair each document's description with its level's word limit.
+        
+        Args:
+            limits: (type, max_words) pairs in priority order
+            documents: Documents aligned with limits; missing ones may be None
+            
+        Returns:
+            List of (type, text, max_words) tuples for _combine_contexts
+        """
+        contexts = []
+        for (context_type, word_limit), document in zip(limits, documents):
+            if document:
+                description = document.get("description", "")
+                if description:
+                    contexts.append((context_type, description, word_limit))
+        return contexts
+    
     def _combine_contexts(self, contexts: List[tuple], target_words: int = 15, max_words: int = 20) -> str:
         """
         Combine contexts intelligently, respecting word limits and priorities.
@@ -129,14 +172,15 @@ class TextProcessor:
         
         combined_words = []
         
+        # Extract each context once; the first max_words keywords cover both passes
+        extracted = [(self._extract_keywords(text, max_words), word_limit)
+                     for _, text, word_limit in contexts]
+        
         # First pass: take words according to priority and limits
-        for context_type, text, word_limit in contexts:
+        for words, word_limit in extracted:
             if len(combined_words) >= max_words:
                 break
             
-            # Process the text
-            words = self._extract_keywords(text, word_limit)
-            
             # Add words up to our limits
             remaining_budget = max_words - len(combined_words)
             words_to_add = words[:min(word_limit, remaining_budget)]
@@ -145,15 +189,10 @@ class TextProcessor:
         
         # If we're under target, try to add more from available contexts
         if len(combined_words) < target_words:
-            for context_type, text, original_limit in contexts:
+            for all_words, original_limit in extracted:
                 if len(combined_words) >= max_words:
                     break
                 
-                # Get more words from this context
-                all_words = self._extract_keywords(text, max_words)
-                existing_from_this_context = len([w for w in combined_words 
-                                                if w in all_words[:original_limit]])
-                
                 # Add additional words beyond original limit
                 additional_words = all_words[original_limit:]
                 remaining_budget = min(target_words - len(combined_words), 
@@ -168,87 +207,118 @@ class TextProcessor:
             if word not in seen:
                 seen.add(word)
                 unique_words.append(word)
+                if len(unique_words) == max_words:
+                    break
         
-        return " ".join(unique_words[:max_words])
+        return " ".join(unique_words)
     
     def _extract_keywords(self, text: str, max_words: int = None) -> List[str]:
         """Extract meaningful keywords from text."""
         if not text:
             return []
         
+        return list(self._keywords_cached(text, max_words))
+    
+    def _extract_keywords_uncached(self, text: str, max_words: int = None) -> Tuple[str, ...]:
+        """Dispatch keyword extraction; returns a tuple so cached results stay immutable."""
         if self.nlp and self.spacy_working:
-            return self._extract_keywords_spacy(text, max_words)
+            return tuple(self._extract_keywords_spacy(text, max_words))
         else:
-            return self._extract_keywords_simple(text, max_words)
+            return tuple(self._extract_keywords_simple(text, max_words))
+    
+    def prime_keywords(self, texts: List[str], batch_size: int = 256,
+                       n_process: int = 1) -> int:
+        """
+        Run spaCy over many texts at once so later keyword lookups skip the
+        per-text pipeline call. No-op with the simple extractor.
+        
+        Args:
+            texts: Descriptions about to be processed (duplicates, empties and
+                texts already cached are skipped)
+            batch_size: spaCy pipe batch size
+            n_process: spaCy worker processes
+            
+        Returns:
+            Number of texts primed
+        """
+        if not (self.nlp and self.spacy_working):
+            return 0
+        
+        pending = [text for text in dict.fromkeys(texts)
+                   if text and isinstance(text, str) and text not in self._spacy_keywords]
+        if not pending:
+            return 0
+        
+        try:
+            docs = self.nlp.pipe((text.lower() for text in pending),
+                                 batch_size=batch_size, n_process=n_process)
+            for text, doc in zip(pending, docs):
+                self._cache_spacy_keywords(text, self._keywords_from_doc(doc))
+            return len(pending)
+        except Exception as e:
+            logger.warning(f"spaCy batch processing failed: {e}")
+            return 0
     
     def _extract_keywords_spacy(self, text: str, max_words: int = None) -> List[str]:
         """Extract keywords using spaCy."""
         try:
-            doc = self.nlp(text.lower())
-            
-            keywords = []
-            for token in doc:
-                # Skip stop words, punctuation, spaces
-                if (token.is_stop or token.is_punct or token.is_space or 
-                    len(token.text) < 2 or token.text in self.audio_stop_words):
-                    continue
-                
-                # Use lemma for better semantic matching
-                lemma = token.lemma_.strip()
-                if lemma and len(lemma) > 1:
-                    keywords.append(lemma)
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_keywords = []
-            for word in keywords:
-                if word not in seen:
-                    seen.add(word)
-                    unique_keywords.append(word)
+            unique_keywords = self._spacy_keywords.get(text)
+            if unique_keywords is None:
+                unique_keywords = self._keywords_from_doc(self.nlp(text.lower()))
+                self._cache_spacy_keywords(text, unique_keywords)
+            else:
+                self._spacy_keywords.move_to_end(text)
             
-            return unique_keywords[:max_words] if max_words else unique_keywords
+            return list(unique_keywords[:max_words] if max_words else unique_keywords)
             
         except Exception as e:
             logger.warning(f"spaCy processing failed: {e}, falling back to simple")
             return self._extract_keywords_simple(text, max_words)
     
+    def _cache_spacy_keywords(self, text: str, keywords: List[str]):
+        """Store a text's full keyword list, evicting the least recently used past the limit."""
+        self._spacy_keywords[text] = tuple(keywords)
+        self._spacy_keywords.move_to_end(text)
+        if len(self._spacy_keywords) > CLEAN_CACHE_SIZE:
+            self._spacy_keywords.popitem(last=False)
+    
+    def _keywords_from_doc(self, doc) -> List[str]:
+        """Unique lemmas of the meaningful tokens in a spaCy doc, in order."""
+        audio_stop_words = self.audio_stop_words
+        keywords = []
+        for token in doc:
+            # Skip stop words, punctuation, spaces
+            if (token.is_stop or token.is_punct or token.is_space or 
+                len(token.text) < 2 or token.text in audio_stop_words):
+                continue
+            
+            # Use lemma for better semantic matching; check it against the
+            # audio stop words too so plurals like "sounds" are dropped
+            lemma = token.lemma_.strip()
+            if lemma and len(lemma) > 1 and lemma not in audio_stop_words:
+                keywords.append(lemma)
+        
+        # Remove duplicates while preserving order
+        return list(dict.fromkeys(keywords))
+    
     def _extract_keywords_simple(self, text: str, max_words: int = None) -> List[str]:
         """Extract keywords using simple text processing."""
         # Clean and split
         cleaned = self._clean_text(text)
         words = cleaned.split()
         
-        # Simple stop words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-            'should', 'may', 'might', 'this', 'that', 'these', 'those'
-        }
-        
-        # Combine with audio stop words
-        all_stop_words = stop_words | self.audio_stop_words
-        
         # Filter meaningful words
-        keywords = []
-        for word in words:
-            if len(word) > 2 and word not in all_stop_words:
-                keywords.append(word)
+        stop_words = self._ALL_STOP_WORDS
+        keywords = [word for word in words if len(word) > 2 and word not in stop_words]
         
         return keywords[:max_words] if max_words else keywords
     
     def _clean_text(self, text: str) -> str:
         """Basic text cleaning."""
-        if not text:
+        # Fast path: descriptions are almost always non-empty strings
+        if type(text) is str:
+            return _clean_text_cached(text) if text else ""
+        if text is None:
             return ""
         
-        # Convert to lowercase
-        text = str(text).lower().strip()
-        
-        # Remove special characters, keep alphanumeric and spaces
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
\ No newline at end of file
+        return _clean_text_cached(str(text)) if text else ""
\ No newline at end of file
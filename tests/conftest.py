@@ -0,0 +1,36 @@
+"""
+Shared pytest fixtures for the Hibikidō test suite.
+"""
+
+import logging
+
+import pytest
+
+
+def pytest_configure(config):
+    """Keep hibikido logging out of the hot paths unless log output was requested."""
+    package_logger = logging.getLogger("hibikido")
+    package_logger.addHandler(logging.NullHandler())
+    if not (config.getini("log_cli") or config.getoption("log_cli_level")
+            or config.getoption("log_level")):
+        package_logger.setLevel(logging.WARNING)
+
+
+class FakeClock:
+    """Manually advanced clock in integer nanoseconds (see Orchestrator's clock)."""
+    
+    def __init__(self, start_ns: int = 1_000_000_000):
+        self.now = start_ns
+    
+    def __call__(self) -> int:
+        return self.now
+    
+    def advance(self, seconds: float):
+        """Move time forward without sleeping."""
+        self.now += int(seconds * 1_000_000_000)
+
+
+@pytest.fixture
+def fake_clock():
+    """A FakeClock starting at 1s."""
+    return FakeClock()
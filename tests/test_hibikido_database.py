@@ -4,46 +4,210 @@ Test Suite for Hibikidō Database Manager (Updated for Path-based Schema)
 
 Comprehensive tests for the hierarchical database schema with path-based references.
 Run with: python -m pytest test_hibikido_database.py -v
+In parallel: python -m pytest -n auto test_hibikido_database.py (pytest-xdist)
+Database logs: add --log-cli-level=INFO (tests assert on logs via caplog)
 """
 
+import os
 import pytest
 import logging
 from datetime import datetime
 from typing import Dict, Any, List
-import uuid
+import itertools
+import sys
+import time
 
-from hibikido.database_manager import HibikidoDatabase
+from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
+
+from hibikido.database_manager import (
+    HibikidoDatabase, SEGMENT_LOOKUP_FIELDS, PRESET_LOOKUP_FIELDS
+)
+
+
+# TEST DATA (read-only; loaders build fresh documents from these)
+
+# Shared segmentation id/method, interned once and reused by every fixture row
+_MANUAL = sys.intern("manual")
+
+# Row templates for the bulk loaders: every row is a copy with identical key
+# order, updated with its own fields
+_SEGMENT_TEMPLATE = {
+    "source_path": None,
+    "segmentation_id": _MANUAL,
+    "start": 0.0,
+    "end": 0.0,
+    "description": "",
+    "embedding_text": "",
+    "faiss_index": None
+}
+
+_PRESET_TEMPLATE = {
+    "effect_path": None,
+    "parameters": None,
+    "description": "",
+    "embedding_text": "",
+    "faiss_index": None
+}
+
+
+def _row(template: Dict[str, Any], *sources: Dict[str, Any], **fields) -> Dict[str, Any]:
+    """Copy a row template and fill it from the given dicts and keyword fields."""
+    row = template.copy()
+    for source in sources:
+        row.update(source)
+    row.update(fields)
+    return row
+
+
+# Segments for the full workflow test, referencing recordings by path
+_WORKFLOW_SEGMENTS = (
+    {
+        "source_path": "sounds/forest/morning_birds.wav",
+        "start": 0.0, "end": 0.3,
+        "description": "Robin territorial call",
+        "embedding_text": "robin territorial call bright morning",
+        "faiss_index": 100
+    },
+    {
+        "source_path": "sounds/forest/morning_birds.wav", 
+        "start": 0.4, "end": 0.8,
+        "description": "Blackbird melodic song",
+        "embedding_text": "blackbird melodic song complex musical",
+        "faiss_index": 101
+    },
+    {
+        "source_path": "sounds/city/traffic_ambience.wav",
+        "start": 0.0, "end": 1.0,
+        "description": "Urban traffic flow",
+        "embedding_text": "urban traffic flow constant rumble",
+        "faiss_index": 102
+    }
+)
+
+# Presets for the full workflow test, referencing effects by path
+_WORKFLOW_PRESETS = (
+    {
+        "effect_path": "effects/reverb/cathedral.maxpat",
+        "parameters": [0.8, 0.3, 0.9],
+        "description": "Warm cathedral reverb",
+        "embedding_text": "warm cathedral reverb spacious sacred",
+        "faiss_index": 200
+    },
+    {
+        "effect_path": "effects/granular/processor.maxpat",
+        "parameters": [0.05, 0.2, 2.0],
+        "description": "Ethereal time stretch",
+        "embedding_text": "ethereal time stretch atmospheric slow",
+        "faiss_index": 201
+    }
+)
+
+# Bird call segments for TestDataFixtures (normalized 0-1 values)
+_BIRD_SEGMENTS = (
+    {
+        "id": "robin_territorial_001",
+        "start": 0.05, "end": 0.35,
+        "description": "Robin territorial call, bright and assertive",
+        "embedding_text": "robin territorial call bright assertive morning"
+    },
+    {
+        "id": "blackbird_song_001", 
+        "start": 0.45, "end": 0.85,
+        "description": "Blackbird melodic song, complex phrases",
+        "embedding_text": "blackbird melodic song complex phrases musical"
+    },
+    {
+        "id": "wren_trill_001",
+        "start": 0.90, "end": 1.0,
+        "description": "Wren rapid trill, high frequency",
+        "embedding_text": "wren rapid trill high frequency energetic"
+    }
+)
+
+# Granular processor presets for TestDataFixtures
+_GRANULAR_PRESETS = (
+    {
+        "parameters": [0.05, 0.2, 2.0, 0.7],
+        "description": "Ethereal time-stretched texture",
+        "embedding_text": "ethereal time stretched texture atmospheric slow",
+        "faiss_index": 2000
+    },
+    {
+        "parameters": [0.01, 1.5, 0.5, 0.9],
+        "description": "Glitchy fragmented rhythm",
+        "embedding_text": "glitchy fragmented rhythm digital chaotic fast",
+        "faiss_index": 2001
+    },
+    {
+        "parameters": [0.1, 0.0, 1.0, 0.3],
+        "description": "Sparse natural granulation",
+        "embedding_text": "sparse natural granulation organic subtle",
+        "faiss_index": 2002
+    }
+)
+
+
+# Sequential suffixes for generated paths/ids: unique within the session and
+# append-only in the path indexes (random UUIDs land on random B-tree leaves)
+_sample_ids = itertools.count()
+
+# Collections emptied between tests (indexes are kept)
+_COLLECTIONS = ("recordings", "segments", "effects", "presets",
+                "performances", "segmentations")
+
+
+_MONGO_URI = "mongodb://localhost:27017"
+
+
+@pytest.fixture(scope="session")
+def mongo_client():
+    """One MongoClient (pool and monitor threads) for the whole test process."""
+    client = MongoClient(_MONGO_URI)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def db(mongo_client):
+    """Create a test database instance shared by the whole session."""
+    # Use a test database to avoid conflicts; under pytest-xdist (-n auto) each
+    # worker gets its own so workers never see each other's documents
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    db_name = f"hibikido_test_{worker}" if worker else "hibikido_test"
+    test_db = HibikidoDatabase(uri=_MONGO_URI, db_name=db_name)
+    
+    if not test_db.connect(client=mongo_client):
+        pytest.skip("MongoDB not available")
+    
+    yield test_db
+    
+    # Cleanup: drop the test database (and its indexes with it)
+    test_db.client.drop_database(db_name)
+    HibikidoDatabase.forget_indexes(test_db.client, db_name)
+    test_db.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_db(db):
+    """Empty every collection after each test; cheaper than dropping the database."""
+    yield
+    for name in _COLLECTIONS:
+        getattr(db, name).delete_many({})
 
-# Configure logging for tests
-logging.basicConfig(level=logging.INFO)
 
 class TestHibikidoDatabase:
     """Test class for the path-based hierarchical database."""
     
-    @pytest.fixture(scope="function")
-    def db(self):
-        """Create a test database instance."""
-        # Use a test database to avoid conflicts
-        test_db = HibikidoDatabase(db_name="hibikido_test")
-        
-        if not test_db.connect():
-            pytest.skip("MongoDB not available")
-        
-        yield test_db
-        
-        # Cleanup: drop the test database
-        test_db.client.drop_database("hibikido_test")
-        test_db.close()
-    
     @pytest.fixture
     def sample_recording_path(self):
         """Generate a unique recording path for tests."""
-        return f"test/recordings/sample_{uuid.uuid4().hex[:8]}.wav"
+        return f"test/recordings/sample_{next(_sample_ids):08d}.wav"
     
     @pytest.fixture
     def sample_effect_path(self):
         """Generate a unique effect path for tests."""
-        return f"test/effects/sample_{uuid.uuid4().hex[:8]}.maxpat"
+        return f"test/effects/sample_{next(_sample_ids):08d}.maxpat"
     
     def test_database_connection(self, db):
         """Test basic database connection and initialization."""
@@ -56,31 +220,67 @@ class TestHibikidoDatabase:
         assert db.performances is not None
         assert db.segmentations is not None
     
+    def test_lookup_indexes(self, db):
+        """Test that the path and FAISS lookups are backed by indexes."""
+        def index_keys(collection):
+            return {tuple(field for field, _ in spec["key"])
+                    for spec in collection.index_information().values()}
+        
+        assert ("path",) in index_keys(db.recordings)
+        assert ("path",) in index_keys(db.effects)
+        assert ("FAISS_index",) in index_keys(db.segments)
+        assert ("source_path", "start") in index_keys(db.segments)
+        assert ("FAISS_index",) in index_keys(db.presets)
+        assert ("FAISS_index", "source_path", "description") in index_keys(db.segments)
+        assert ("FAISS_index", "effect_path", "description") in index_keys(db.presets)
+        assert ("effect_path",) in index_keys(db.presets)
+    
     # RECORDINGS TESTS (path-based)
     
     def test_add_recording(self, db, sample_recording_path):
         """Test adding a new recording with path as identifier."""
-        result = db.add_recording(
+        # The upsert returns the stored document, no follow-up read needed
+        recording, inserted = db.add_recording_returning(
             path=sample_recording_path,
             description="Birds singing in the morning forest"
         )
-        assert result is True
-        
-        # Verify it was added
-        recording = db.get_recording_by_path(sample_recording_path)
+        assert inserted is True
         assert recording is not None
         assert recording["path"] == sample_recording_path
         assert recording["description"] == "Birds singing in the morning forest"
         assert "created_at" in recording
     
-    def test_add_duplicate_recording(self, db, sample_recording_path):
-        """Test that duplicate recording paths are rejected."""
-        # Add first recording
-        db.add_recording(sample_recording_path, "Description 1")
-        
-        # Try to add duplicate
-        result = db.add_recording(sample_recording_path, "Description 2")
-        assert result is False
+    @pytest.mark.parametrize("collection, add_method, get_method, path_template, first, second", [
+        ("recordings", "add_recording", "get_recording_by_path", "test/recordings/dup_{:08d}.wav",
+         {"description": "Description 1"}, {"description": "Description 2"}),
+        ("effects", "add_effect", "get_effect_by_path", "test/effects/dup_{:08d}.maxpat",
+         {"name": "Effect 1", "description": "Description 1"},
+         {"name": "Effect 2", "description": "Description 2"}),
+    ])
+    def test_add_duplicate_path(self, db, caplog, collection, add_method, get_method,
+                                path_template, first, second):
+        """Test that duplicate recording/effect paths are rejected."""
+        path = path_template.format(next(_sample_ids))
+        add = getattr(db, add_method)
+        assert add(path=path, **first) is True
+        
+        # Try to add duplicate: rejected by the unique path index, first write kept
+        with caplog.at_level(logging.WARNING, logger="hibikido.database_manager"):
+            assert add(path=path, **second) is False
+        assert f"Duplicate {collection[:-1]} path: {path}" in caplog.text
+        assert getattr(db, collection).count_documents({"path": path}) == 1
+        stored = getattr(db, get_method)(path)
+        assert {field: stored[field] for field in first} == first
+    
+    def test_add_recording_returning_existing(self, db, sample_recording_path):
+        """Test that re-adding a path returns the original recording unchanged."""
+        first, first_inserted = db.add_recording_returning(sample_recording_path, "Description 1")
+        second, second_inserted = db.add_recording_returning(sample_recording_path, "Description 2")
+        assert first_inserted is True
+        assert second_inserted is False
+        assert second["_id"] == first["_id"]
+        assert second["description"] == "Description 1"
+        assert db.recordings.count_documents({"path": sample_recording_path}) == 1
     
     def test_get_all_recordings(self, db):
         """Test retrieving all recordings."""
@@ -89,7 +289,7 @@ class TestHibikidoDatabase:
         for i, path in enumerate(paths):
             db.add_recording(path, f"Description {i}")
         
-        recordings = db.get_all_recordings()
+        recordings = db.get_all_recordings(projection={"path": 1, "_id": 0})
         assert len(recordings) >= 3
         
         # Check that our recordings are in the results
@@ -107,7 +307,7 @@ class TestHibikidoDatabase:
         # Add segment
         result = db.add_segment(
             source_path=sample_recording_path,
-            segmentation_id="manual",
+            segmentation_id=_MANUAL,
             start=0.1,
             end=0.6,
             description="High-pitched bird call",
@@ -134,7 +334,7 @@ class TestHibikidoDatabase:
         faiss_index = 123
         db.add_segment(
             source_path=sample_recording_path,
-            segmentation_id="manual",
+            segmentation_id=_MANUAL,
             start=0.0,
             end=0.5,
             description="Test segment",
@@ -143,7 +343,7 @@ class TestHibikidoDatabase:
         )
         
         # Retrieve by FAISS index
-        segment = db.get_segment_by_faiss_id(faiss_index)
+        segment = db.get_segment_by_faiss_id(faiss_index, SEGMENT_LOOKUP_FIELDS)
         assert segment is not None
         assert segment["FAISS_index"] == faiss_index
         assert segment["source_path"] == sample_recording_path
@@ -158,7 +358,7 @@ class TestHibikidoDatabase:
         for i in range(3):
             success = db.add_segment(
                 source_path=sample_recording_path,
-                segmentation_id="manual",
+                segmentation_id=_MANUAL,
                 start=i * 0.3,
                 end=(i + 1) * 0.3,
                 description=f"Segment {i}",
@@ -166,13 +366,24 @@ class TestHibikidoDatabase:
             )
             assert success, f"Failed to add segment {i}"
         
-        # Retrieve segments
-        segments = db.get_segments_by_recording_path(sample_recording_path)
+        # Retrieve segments (only the indexed fields the ordering check needs)
+        segments = db.get_segments_by_recording_path(
+            sample_recording_path, projection={"_id": 0, "source_path": 1, "start": 1}
+        )
         assert len(segments) == 3
         
         # Check they're sorted by start time
-        for i in range(len(segments) - 1):
-            assert segments[i]["start"] <= segments[i + 1]["start"]
+        starts = [s["start"] for s in segments]
+        assert starts == sorted(starts)
+        
+        # The (source_path, start) index answers filter, sort and projection:
+        # no blocking SORT stage and no document FETCH
+        plan = str(db.segments.find(
+            {"source_path": sample_recording_path},
+            {"_id": 0, "source_path": 1, "start": 1}
+        ).sort([("source_path", 1), ("start", 1)]).explain()["queryPlanner"]["winningPlan"])
+        assert "'SORT'" not in plan
+        assert "FETCH" not in plan
     
     def test_normalized_segment_values(self, db, sample_recording_path):
         """Test that segments store normalized 0-1 values."""
@@ -182,7 +393,7 @@ class TestHibikidoDatabase:
         # Add segment with normalized values
         db.add_segment(
             source_path=sample_recording_path,
-            segmentation_id="manual",
+            segmentation_id=_MANUAL,
             start=0.25,  # Normalized values
             end=0.75,
             description="Middle section",
@@ -215,15 +426,6 @@ class TestHibikidoDatabase:
         assert effect["path"] == sample_effect_path
         assert effect["description"] == "Granular synthesis delay with pitch shifting"
     
-    def test_add_duplicate_effect(self, db, sample_effect_path):
-        """Test that duplicate effect paths are rejected."""
-        # Add first effect
-        db.add_effect(sample_effect_path, "Effect 1", "Description 1")
-        
-        # Try to add duplicate
-        result = db.add_effect(sample_effect_path, "Effect 2", "Description 2")
-        assert result is False
-    
     # PRESETS TESTS (separate collection, reference by effect_path)
     
     def test_add_preset(self, db, sample_effect_path):
@@ -266,7 +468,7 @@ class TestHibikidoDatabase:
         )
         
         # Retrieve by FAISS index
-        preset = db.get_preset_by_faiss_id(faiss_index)
+        preset = db.get_preset_by_faiss_id(faiss_index, PRESET_LOOKUP_FIELDS)
         assert preset is not None
         assert preset["FAISS_index"] == faiss_index
         assert preset["effect_path"] == sample_effect_path
@@ -287,8 +489,10 @@ class TestHibikidoDatabase:
             )
             assert success, f"Failed to add preset {i}"
         
-        # Retrieve presets
-        presets = db.get_presets_by_effect_path(sample_effect_path)
+        # Retrieve presets (only the reference field is checked)
+        presets = db.get_presets_by_effect_path(
+            sample_effect_path, projection={"effect_path": 1, "_id": 0}
+        )
         assert len(presets) == 3
         
         # Check all reference the same effect
@@ -314,13 +518,38 @@ class TestHibikidoDatabase:
         assert len(presets) >= 1
         
         # Check our preset is in the results
-        found = False
-        for preset in presets:
-            if (preset["effect_path"] == sample_effect_path and 
-                preset["description"] == "No embedding preset"):
-                found = True
-                break
-        assert found
+        assert any(
+            preset["effect_path"] == sample_effect_path and
+            preset["description"] == "No embedding preset"
+            for preset in presets
+        ), f"Preset for {sample_effect_path} not found among {len(presets)} presets"
+    
+    def test_add_segments_bulk(self, db, sample_recording_path):
+        """Test bulk segment insert, skipping duplicates without aborting the batch."""
+        db.add_recording(sample_recording_path, "Test recording")
+        
+        segments = [
+            {
+                "source_path": sample_recording_path,
+                "segmentation_id": _MANUAL,
+                "start": i * 0.25,
+                "end": (i + 1) * 0.25,
+                "description": f"Segment {i}",
+                "embedding_text": f"segment {i}",
+                "faiss_index": 300 + i,
+                "metadata": {"freq_low": 100 * (i + 1), "freq_high": 1000 * (i + 1)}
+            }
+            for i in range(4)
+        ]
+        segments.append(dict(segments[0], description="Duplicate FAISS index"))
+        
+        assert db.add_segments_bulk(segments) == 4
+        assert len(db.get_segments_by_recording_path(sample_recording_path)) == 4
+        assert db.get_segment_by_faiss_id(303, SEGMENT_LOOKUP_FIELDS)["description"] == "Segment 3"
+        
+        # Metadata fields are stored on the segment itself
+        segment = db.get_segment_by_faiss_id(302, {"_id": 0, "freq_low": 1, "freq_high": 1})
+        assert segment == {"freq_low": 300, "freq_high": 3000}
     
     # STATISTICS TESTS
     
@@ -332,7 +561,7 @@ class TestHibikidoDatabase:
         # Add segment with embedding
         db.add_segment(
             source_path=sample_recording_path,
-            segmentation_id="manual",
+            segmentation_id=_MANUAL,
             start=0.0,
             end=0.5,
             description="Test segment",
@@ -351,7 +580,7 @@ class TestHibikidoDatabase:
         )
         
         # Add performance
-        performance_id = f"perf_{uuid.uuid4().hex[:8]}"
+        performance_id = f"perf_{next(_sample_ids):08d}"
         db.add_performance(performance_id)
         
         # Get stats
@@ -370,118 +599,67 @@ class TestHibikidoDatabase:
     
     def test_full_path_based_workflow(self, db):
         """Test a complete workflow using path-based references."""
-        # 1. Add recordings
         recording_paths = [
             "sounds/forest/morning_birds.wav",
             "sounds/city/traffic_ambience.wav"
         ]
-        
-        for path in recording_paths:
-            success = db.add_recording(
-                path=path,
-                description=f"Recording: {path.split('/')[-1]}"
-            )
-            assert success, f"Failed to add recording {path}"
-        
-        # 2. Add segments referencing by path
-        segments_data = [
-            {
-                "source_path": "sounds/forest/morning_birds.wav",
-                "start": 0.0, "end": 0.3,
-                "description": "Robin territorial call",
-                "embedding_text": "robin territorial call bright morning",
-                "faiss_index": 100
-            },
-            {
-                "source_path": "sounds/forest/morning_birds.wav", 
-                "start": 0.4, "end": 0.8,
-                "description": "Blackbird melodic song",
-                "embedding_text": "blackbird melodic song complex musical",
-                "faiss_index": 101
-            },
-            {
-                "source_path": "sounds/city/traffic_ambience.wav",
-                "start": 0.0, "end": 1.0,
-                "description": "Urban traffic flow",
-                "embedding_text": "urban traffic flow constant rumble",
-                "faiss_index": 102
-            }
-        ]
-        
-        added_segments = []
-        for seg in segments_data:
-            success = db.add_segment(
-                source_path=seg["source_path"],
-                segmentation_id="manual",
-                start=seg["start"],
-                end=seg["end"],
-                description=seg["description"],
-                embedding_text=seg["embedding_text"],
-                faiss_index=seg["faiss_index"]
-            )
-            assert success, f"Failed to add segment {seg['description']}"
-            added_segments.append(seg)
-        
-        # 3. Add effects
         effect_paths = [
             "effects/reverb/cathedral.maxpat",
             "effects/granular/processor.maxpat"
         ]
         
-        for path in effect_paths:
-            success = db.add_effect(
-                path=path,
-                name=path.split('/')[-1].split('.')[0],
-                description=f"Effect: {path}"
+        # 1-4. Add recordings, segments (by source path), effects and presets
+        # (by effect path) with one insert_many per collection, in a single
+        # transaction where the deployment supports one
+        def load(session):
+            return db.bulk_initial_load(
+                recordings=[
+                    {"path": path, "description": f"Recording: {path.split('/')[-1]}"}
+                    for path in recording_paths
+                ],
+                segments=[_row(_SEGMENT_TEMPLATE, seg) for seg in _WORKFLOW_SEGMENTS],
+                effects=[
+                    {"path": path, "name": path.split('/')[-1].split('.')[0],
+                     "description": f"Effect: {path}"}
+                    for path in effect_paths
+                ],
+                presets=[_row(_PRESET_TEMPLATE, preset) for preset in _WORKFLOW_PRESETS],
+                session=session,
+                bypass_validation=True
             )
-            assert success, f"Failed to add effect {path}"
-        
-        # 4. Add presets referencing by effect path
-        presets_data = [
-            {
-                "effect_path": "effects/reverb/cathedral.maxpat",
-                "parameters": [0.8, 0.3, 0.9],
-                "description": "Warm cathedral reverb",
-                "embedding_text": "warm cathedral reverb spacious sacred",
-                "faiss_index": 200
-            },
-            {
-                "effect_path": "effects/granular/processor.maxpat",
-                "parameters": [0.05, 0.2, 2.0],
-                "description": "Ethereal time stretch",
-                "embedding_text": "ethereal time stretch atmospheric slow",
-                "faiss_index": 201
-            }
-        ]
         
-        added_presets = []
-        for preset in presets_data:
-            success = db.add_preset(
-                effect_path=preset["effect_path"],
-                parameters=preset["parameters"],
-                description=preset["description"],
-                embedding_text=preset["embedding_text"],
-                faiss_index=preset["faiss_index"]
-            )
-            assert success, f"Failed to add preset {preset['description']}"
-            added_presets.append(preset)
+        with db.client.start_session() as session:
+            if _supports_transactions(db.client):
+                counts = session.with_transaction(load)
+            else:
+                counts = load(session)
+        assert counts == {
+            "recordings": len(recording_paths),
+            "segments": len(_WORKFLOW_SEGMENTS),
+            "effects": len(effect_paths),
+            "presets": len(_WORKFLOW_PRESETS)
+        }
         
         # 5. Verify path-based relationships
         # Check segments for forest recording
-        forest_segments = db.get_segments_by_recording_path("sounds/forest/morning_birds.wav")
+        forest_segments = db.get_segments_by_recording_path(
+            "sounds/forest/morning_birds.wav", projection={"_id": 0, "source_path": 1, "start": 1}
+        )
         assert len(forest_segments) == 2
         
         # Check presets for reverb effect
-        reverb_presets = db.get_presets_by_effect_path("effects/reverb/cathedral.maxpat")
+        reverb_presets = db.get_presets_by_effect_path(
+            "effects/reverb/cathedral.maxpat", projection={"_id": 1}
+        )
         assert len(reverb_presets) == 1
         
         # 6. Verify FAISS lookups work
-        robin_segment = db.get_segment_by_faiss_id(100)
+        robin_segment = db.get_segment_by_faiss_id(100, SEGMENT_LOOKUP_FIELDS)
         assert robin_segment is not None
         assert robin_segment["description"] == "Robin territorial call"
         assert robin_segment["source_path"] == "sounds/forest/morning_birds.wav"
         
-        cathedral_preset = db.get_preset_by_faiss_id(200)
+        cathedral_preset = db.get_preset_by_faiss_id(200, PRESET_LOOKUP_FIELDS)
         assert cathedral_preset is not None
         assert cathedral_preset["description"] == "Warm cathedral reverb"
         assert cathedral_preset["effect_path"] == "effects/reverb/cathedral.maxpat"
@@ -499,8 +677,30 @@ class TestHibikidoDatabase:
 
 # UTILITY TESTS AND FIXTURES
 
+def _supports_transactions(client: MongoClient) -> bool:
+    """Multi-document transactions need a replica set or sharded cluster."""
+    return client.topology_description.topology_type_name != "Single"
+
+
+def _await_count(collection, query: Dict[str, Any], expected: int, timeout: float = 5.0):
+    """Fence for unacknowledged writes: wait until they are visible to reads, or fail."""
+    deadline = time.monotonic() + timeout
+    count = collection.count_documents(query)
+    while count < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+        count = collection.count_documents(query)
+    assert count >= expected, f"Only {count}/{expected} documents visible after {timeout}s"
+
+
 class TestDataFixtures:
-    """Create realistic test data for manual testing with path-based schema."""
+    """
+    Create realistic test data with path-based schema.
+    
+    Bulk loads are unacknowledged (w=0) and fenced by an indexed count; test
+    data only, never production writes.
+    """
+    
+    _UNACKNOWLEDGED = WriteConcern(w=0)
     
     @staticmethod
     def create_bird_recording_set(db: HibikidoDatabase):
@@ -516,45 +716,27 @@ class TestDataFixtures:
         segmentation_id = "manual_bird_calls_v1"
         db.add_segmentation(
             segmentation_id=segmentation_id,
-            method="manual",
+            method=_MANUAL,
             parameters={"min_duration": 0.3, "focus": "bird_calls"},
             description="Hand-segmented individual bird vocalizations"
         )
         
-        # Segments (normalized 0-1 values)
-        segments = [
-            {
-                "id": "robin_territorial_001",
-                "start": 0.05, "end": 0.35,
-                "description": "Robin territorial call, bright and assertive",
-                "embedding_text": "robin territorial call bright assertive morning"
-            },
-            {
-                "id": "blackbird_song_001", 
-                "start": 0.45, "end": 0.85,
-                "description": "Blackbird melodic song, complex phrases",
-                "embedding_text": "blackbird melodic song complex phrases musical"
-            },
-            {
-                "id": "wren_trill_001",
-                "start": 0.90, "end": 1.0,
-                "description": "Wren rapid trill, high frequency",
-                "embedding_text": "wren rapid trill high frequency energetic"
-            }
-        ]
-        
-        for i, seg in enumerate(segments):
-            db.add_segment(
-                source_path=recording_path,  # Reference by path
-                segmentation_id=segmentation_id,
-                start=seg["start"],
-                end=seg["end"],
-                description=seg["description"],
-                embedding_text=seg["embedding_text"],
-                faiss_index=1000 + i
-            )
-        
-        return recording_path, segmentation_id, [s["id"] for s in segments]
+        # Segments (normalized 0-1 values), one insert_many
+        sent = db.add_segments_bulk([
+            _row(_SEGMENT_TEMPLATE,
+                 source_path=recording_path,  # Reference by path
+                 segmentation_id=segmentation_id,
+                 start=seg["start"],
+                 end=seg["end"],
+                 description=seg["description"],
+                 embedding_text=seg["embedding_text"],
+                 faiss_index=1000 + i)
+            for i, seg in enumerate(_BIRD_SEGMENTS)
+        ], write_concern=TestDataFixtures._UNACKNOWLEDGED)
+        assert sent == len(_BIRD_SEGMENTS)
+        _await_count(db.segments, {"source_path": recording_path}, len(_BIRD_SEGMENTS))
+        
+        return recording_path, segmentation_id, [s["id"] for s in _BIRD_SEGMENTS]
     
     @staticmethod
     def create_granular_effects(db: HibikidoDatabase):
@@ -566,103 +748,95 @@ class TestDataFixtures:
             description="Advanced granular synthesis with pitch and time manipulation"
         )
         
-        presets = [
-            {
-                "parameters": [0.05, 0.2, 2.0, 0.7],
-                "description": "Ethereal time-stretched texture",
-                "embedding_text": "ethereal time stretched texture atmospheric slow",
-                "faiss_index": 2000
-            },
-            {
-                "parameters": [0.01, 1.5, 0.5, 0.9],
-                "description": "Glitchy fragmented rhythm",
-                "embedding_text": "glitchy fragmented rhythm digital chaotic fast",
-                "faiss_index": 2001
-            },
-            {
-                "parameters": [0.1, 0.0, 1.0, 0.3],
-                "description": "Sparse natural granulation",
-                "embedding_text": "sparse natural granulation organic subtle",
-                "faiss_index": 2002
-            }
-        ]
-        
-        for preset in presets:
-            db.add_preset(
-                effect_path=effect_path,  # Reference by path
-                parameters=preset["parameters"],
-                description=preset["description"],
-                embedding_text=preset["embedding_text"],
-                faiss_index=preset["faiss_index"]
-            )
+        sent = db.add_presets_bulk([
+            _row(_PRESET_TEMPLATE, preset, effect_path=effect_path)  # Reference by path
+            for preset in _GRANULAR_PRESETS
+        ], write_concern=TestDataFixtures._UNACKNOWLEDGED)
+        assert sent == len(_GRANULAR_PRESETS)
+        _await_count(db.presets, {"effect_path": effect_path}, len(_GRANULAR_PRESETS))
         
         return effect_path
 
 
-if __name__ == "__main__":
-    """Run basic tests manually."""
-    import sys
-    
-    # Basic connection test
-    db = HibikidoDatabase(db_name="hibikido_manual_test")
-    
-    if not db.connect():
-        print("❌ Failed to connect to MongoDB")
-        sys.exit(1)
-    
-    print("✅ Connected to MongoDB")
+class CachingDatabase:
+    """
+    Read-through memoization of a HibikidoDatabase's path lookups for one test.
+    
+    Only for read-only phases: cached results are not invalidated by writes.
+    """
+    
+    _CACHED = frozenset({
+        "get_recording_by_path", "get_effect_by_path",
+        "get_segments_by_recording_path", "get_presets_by_effect_path"
+    })
+    
+    def __init__(self, db: HibikidoDatabase):
+        self._db = db
+        self._cache = {}
+    
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if name not in self._CACHED:
+            return attr
+        
+        def cached(*args, **kwargs):
+            # Projections are dicts, so key on their repr
+            key = (name, repr(args), repr(sorted(kwargs.items())))
+            if key not in self._cache:
+                self._cache[key] = attr(*args, **kwargs)
+            return self._cache[key]
+        
+        return cached
+
+
+class TestFixtureData:
+    """Check the TestDataFixtures sets through path-based and FAISS lookups."""
     
-    try:
-        # Create test data
-        print("Creating test data...")
-        fixtures = TestDataFixtures()
-        
-        recording_path, segmentation_id, segment_ids = fixtures.create_bird_recording_set(db)
-        effect_path = fixtures.create_granular_effects(db)
-        
-        # Test retrieval
-        print(f"✅ Created recording: {recording_path}")
-        print(f"✅ Created {len(segment_ids)} segments")
-        print(f"✅ Created effect with presets: {effect_path}")
-        
-        # Test stats
-        stats = db.get_stats()
-        print(f"📊 Database stats: {stats}")
+    @pytest.fixture
+    def loaded_db(self, db):
+        """Database populated with the bird recording set and granular effects."""
+        recording_path, segmentation_id, _ = TestDataFixtures.create_bird_recording_set(db)
+        effect_path = TestDataFixtures.create_granular_effects(db)
+        # Read-only from here on; a fresh cache per test
+        return CachingDatabase(db), recording_path, segmentation_id, effect_path
+    
+    @pytest.mark.parametrize("lookup, faiss_index, expected_description", [
+        ("get_segment_by_faiss_id", 1000, _BIRD_SEGMENTS[0]["description"]),
+        ("get_segment_by_faiss_id", 1002, _BIRD_SEGMENTS[2]["description"]),
+        ("get_preset_by_faiss_id", 2000, _GRANULAR_PRESETS[0]["description"]),
+        ("get_preset_by_faiss_id", 2002, _GRANULAR_PRESETS[2]["description"]),
+    ])
+    def test_faiss_lookups(self, loaded_db, lookup, faiss_index, expected_description):
+        """Test FAISS index lookups on the fixture data."""
+        db = loaded_db[0]
+        
+        projection = SEGMENT_LOOKUP_FIELDS if "segment" in lookup else PRESET_LOOKUP_FIELDS
+        document = getattr(db, lookup)(faiss_index, projection)
+        assert document is not None
+        assert document["description"] == expected_description
+    
+    def test_path_lookups(self, loaded_db):
+        """Test path-based lookups and relationships on the fixture data."""
+        db, recording_path, segmentation_id, effect_path = loaded_db
         
-        # Test path-based lookups
         recording = db.get_recording_by_path(recording_path)
-        if recording:
-            print(f"✅ Found recording by path: {recording['description']}")
+        assert recording is not None
+        assert "oak woodland" in recording["description"]
+        assert db.get_recording_by_path(recording_path) is recording  # served from cache
         
         effect = db.get_effect_by_path(effect_path)
-        if effect:
-            print(f"✅ Found effect by path: {effect['name']}")
-        
-        # Test FAISS lookups
-        robin_segment = db.get_segment_by_faiss_id(1000)
-        if robin_segment:
-            print(f"✅ Found segment by FAISS ID: {robin_segment['description']}")
-        
-        ethereal_preset = db.get_preset_by_faiss_id(2000)
-        if ethereal_preset:
-            print(f"✅ Found preset by FAISS ID: {ethereal_preset['description']}")
-        
-        # Test relationship queries
-        forest_segments = db.get_segments_by_recording_path(recording_path)
-        print(f"✅ Found {len(forest_segments)} segments for recording")
-        
-        granular_presets = db.get_presets_by_effect_path(effect_path)
-        print(f"✅ Found {len(granular_presets)} presets for effect")
+        assert effect is not None
+        assert effect["name"] == "Granular Processor"
         
-        print("\n🎉 All manual tests passed!")
+        segmentation = db.get_segmentation(segmentation_id)
+        assert segmentation is not None
+        assert segmentation["method"] == _MANUAL
         
-    except Exception as e:
-        print(f"❌ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    finally:
-        # Cleanup
-        db.client.drop_database("hibikido_manual_test")
-        db.close()
-        print("🧹 Cleaned up test database")
\ No newline at end of file
+        assert len(db.get_segments_by_recording_path(
+            recording_path, projection={"_id": 0, "source_path": 1, "start": 1})) == len(_BIRD_SEGMENTS)
+        assert len(db.get_presets_by_effect_path(
+            effect_path, projection={"_id": 1})) == len(_GRANULAR_PRESETS)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
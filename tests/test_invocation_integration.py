@@ -4,28 +4,77 @@ Invocation Protocol Integration Test
 
 Test the new invocation paradigm: /invoke → queue all → /manifest over time
 No completion signals, sounds manifest when the cosmos permits.
+In parallel: python -m pytest -n 3 test_invocation_integration.py (pytest-xdist)
 """
 
+import os
 import tempfile
-import shutil
 import time
+import uuid
+
+import pytest
+from pymongo import MongoClient
+
 from hibikido.database_manager import HibikidoDatabase
 from hibikido.embedding_manager import EmbeddingManager
-from hibikido.orchestrator import Orchestrator
+from hibikido.orchestrator import Orchestrator, ManifestationRequest
+
+# One database per xdist worker (or run); each test works in its own set of collections
+_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+_DB_NAME = f"hibikido_invocation_test_{_WORKER}" if _WORKER else "hibikido_invocation_test"
+_COLLECTIONS = ("recordings", "segments", "effects", "presets", "performances", "segmentations")
+
+# Rebuild embeddings persist across runs, so reruns skip the encode pass
+_EMBEDDING_CACHE = os.path.join(tempfile.gettempdir(), "hibikido_test_embeddings")
+
+
+@pytest.fixture(scope="session")
+def shared_env():
+    """Yield (client, temp_dir) shared by all tests; drop the database once at the end."""
+    client = MongoClient("mongodb://localhost:27017")
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield client, temp_dir
+    finally:
+        try:
+            client.drop_database(_DB_NAME)
+            HibikidoDatabase.forget_indexes(client, _DB_NAME)
+        finally:
+            client.close()
+
+
+@pytest.fixture(scope="session")
+def embedding_model():
+    """Sentence transformer loaded once per run and shared by every test's EmbeddingManager."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer("all-MiniLM-L6-v2")
+
 
-def test_invocation_manifestation_flow():
+def _isolated_db(client: MongoClient) -> HibikidoDatabase:
+    """Database manager on the shared client, pointed at a fresh set of collections."""
+    token = uuid.uuid4().hex[:8]
+    db = HibikidoDatabase(db_name=_DB_NAME)
+    assert db.connect(client=client), "Database connection failed"
+    for name in _COLLECTIONS:
+        setattr(db, name, db.db[f"{name}_{token}"])
+    db._create_indexes()
+    return db
+
+
+def test_invocation_manifestation_flow(shared_env, embedding_model):
     """Test the complete invocation to manifestation flow."""
     print("🧪 Testing Invocation → Manifestation Flow")
     print("=" * 50)
     
-    temp_dir = tempfile.mkdtemp()
+    client, temp_dir = shared_env
     
     try:
         # Setup components
-        db = HibikidoDatabase(db_name="hibikido_invocation_test")
-        assert db.connect(), "Database connection failed"
+        db = _isolated_db(client)
         
-        em = EmbeddingManager(index_file=f"{temp_dir}/invocation_test.index")
+        em = EmbeddingManager(index_file=f"{temp_dir}/invocation_test.index",
+                              embedding_cache_dir=os.path.join(_EMBEDDING_CACHE, "invocation"),
+                              model=embedding_model)
         assert em.initialize(), "Embedding manager failed"
         
         orchestrator = Orchestrator(overlap_threshold=0.2, time_precision=0.1)
@@ -40,7 +89,7 @@ def test_invocation_manifestation_flow():
                 "collection": collection,
                 "path": path,
                 "description": description,
-                "timestamp": time.time()
+                "timestamp": time.monotonic_ns()
             })
             print(f"   📡 /manifest: [{index}] {description} @ {path}")
         
@@ -74,64 +123,61 @@ def test_invocation_manifestation_flow():
             }
         ]
         
-        for seg in test_segments:
-            success = db.add_segment(
-                source_path=recording_path,
-                segmentation_id="invocation_test",
-                start=seg["start"],
-                end=seg["end"],
-                description=seg["description"],
-                embedding_text=seg["embedding_text"]
-            )
-            assert success
-            
-            # Add frequency metadata
-            db.segments.update_one(
-                {"source_path": recording_path, "start": seg["start"]},
-                {"$set": {
+        # One insert_many, frequency metadata written with the segments
+        inserted = db.add_segments_bulk([
+            {
+                "source_path": recording_path,
+                "segmentation_id": "invocation_test",
+                "start": seg["start"],
+                "end": seg["end"],
+                "description": seg["description"],
+                "embedding_text": seg["embedding_text"],
+                "metadata": {
                     "freq_low": seg["freq_low"],
                     "freq_high": seg["freq_high"],
                     "duration": seg["duration"]
-                }}
-            )
+                }
+            }
+            for seg in test_segments
+        ])
+        assert inserted == len(test_segments)
         
         # Build index
         stats = em.rebuild_from_database(db)
         print(f"✅ Index built: {stats}")
         
-        # Simulate invocation handler
-        def simulate_invocation(incantation):
-            print(f"\n🔮 Invoking: '{incantation}'")
+        # Simulate invocation handler; all incantations share one batched search
+        def simulate_invocation(*incantations):
+            print(f"\n🔮 Invoking: {', '.join(repr(i) for i in incantations)}")
             
             # Search phase
-            results = em.search(incantation, top_k=10, db_manager=db)
-            segment_results = [r for r in results if r["collection"] == "segments"]
+            segment_results = [
+                r for results in em.search_batch(list(incantations), top_k=10, db_manager=db)
+                for r in results if r["collection"] == "segments"
+            ]
             
             if not segment_results:
                 print("   No resonance found")
                 return
             
-            # Queue ALL results (new paradigm)
+            # Queue ALL results (new paradigm), skipping sounds already queued or playing
             queued_count = 0
             for i, result in enumerate(segment_results):
                 document = result["document"]
+                if orchestrator.contains(str(document.get("_id", "unknown"))):
+                    continue
                 
-                manifestation_data = {
-                    "index": i,
-                    "collection": "segments",
-                    "score": float(result["score"]),
-                    "path": str(document.get("source_path", "")),
-                    "description": document.get("description", "untitled"),
-                    "start": float(document.get("start", 0.0)),
-                    "end": float(document.get("end", 1.0)),
-                    "parameters": "[]",
-                    "sound_id": str(document.get("_id", "unknown")),
-                    "freq_low": document.get("freq_low", 200),
-                    "freq_high": document.get("freq_high", 2000),
-                    "duration": document.get("duration", 1.0)
-                }
+                request = ManifestationRequest(
+                    i, "segments", float(result["score"]),
+                    str(document.get("source_path", "")),
+                    document.get("description", "untitled"),
+                    float(document.get("start", 0.0)), float(document.get("end", 1.0)),
+                    "[]", str(document.get("_id", "unknown")),
+                    document.get("freq_low", 200), document.get("freq_high", 2000),
+                    document.get("duration", 1.0)
+                )
                 
-                if orchestrator.queue_manifestation(manifestation_data):
+                if orchestrator.queue_manifestation(request):
                     queued_count += 1
             
             print(f"   📊 Queued {queued_count} resonances for manifestation")
@@ -184,7 +230,7 @@ def test_invocation_manifestation_flow():
         if manifestations_received:
             first_time = manifestations_received[0]["timestamp"]
             for i, manifest in enumerate(manifestations_received):
-                delay = manifest["timestamp"] - first_time
+                delay = (manifest["timestamp"] - first_time) / 1e9
                 print(f"   {i}: {manifest['description']} (+{delay:.3f}s)")
         
         # Verify no completion signal needed
@@ -199,28 +245,21 @@ def test_invocation_manifestation_flow():
         import traceback
         traceback.print_exc()
         assert False, str(e)
-    
-    finally:
-        try:
-            db.client.drop_database("hibikido_invocation_test")
-            db.close()
-        except:
-            pass
-        shutil.rmtree(temp_dir, ignore_errors=True)
 
-def test_queue_all_strategy():
+def test_queue_all_strategy(shared_env, embedding_model):
     """Test that ALL search results go through orchestrator queue."""
     print(f"\n🧪 Testing Queue-All Strategy")
     print("=" * 50)
     
-    temp_dir = tempfile.mkdtemp()
+    client, temp_dir = shared_env
     
     try:
         # Setup
-        db = HibikidoDatabase(db_name="hibikido_queue_all_test")
-        assert db.connect()
+        db = _isolated_db(client)
         
-        em = EmbeddingManager(index_file=f"{temp_dir}/queue_all_test.index")
+        em = EmbeddingManager(index_file=f"{temp_dir}/queue_all_test.index",
+                              embedding_cache_dir=os.path.join(_EMBEDDING_CACHE, "queue_all"),
+                              model=embedding_model)
         assert em.initialize()
         
         orchestrator = Orchestrator()
@@ -263,25 +302,24 @@ def test_queue_all_strategy():
             }
         ]
         
-        for i, seg in enumerate(segments):
-            db.add_segment(
-                source_path=recording_path,
-                segmentation_id="queue_all_test",
-                start=i * 0.3,
-                end=(i + 1) * 0.3,
-                description=seg["description"],
-                embedding_text=seg["embedding_text"]
-            )
-            
-            # Add frequency metadata
-            db.segments.update_one(
-                {"source_path": recording_path, "start": i * 0.3},
-                {"$set": {
+        # One insert_many, frequency metadata written with the segments
+        inserted = db.add_segments_bulk([
+            {
+                "source_path": recording_path,
+                "segmentation_id": "queue_all_test",
+                "start": i * 0.3,
+                "end": (i + 1) * 0.3,
+                "description": seg["description"],
+                "embedding_text": seg["embedding_text"],
+                "metadata": {
                     "freq_low": seg["freq_low"],
                     "freq_high": seg["freq_high"],
                     "duration": seg["duration"]
-                }}
-            )
+                }
+            }
+            for i, seg in enumerate(segments)
+        ])
+        assert inserted == len(segments)
         
         # Build index
         stats = em.rebuild_from_database(db)
@@ -297,22 +335,17 @@ def test_queue_all_strategy():
         for i, result in enumerate(segment_results):
             document = result["document"]
             
-            manifestation_data = {
-                "index": i,
-                "collection": "segments",
-                "score": float(result["score"]),
-                "path": str(document.get("source_path", "")),
-                "description": document.get("description", "untitled"),
-                "start": float(document.get("start", 0.0)),
-                "end": float(document.get("end", 1.0)),
-                "parameters": "[]",
-                "sound_id": str(document.get("_id", "unknown")),
-                "freq_low": document.get("freq_low", 200),
-                "freq_high": document.get("freq_high", 2000),
-                "duration": document.get("duration", 1.0)
-            }
+            request = ManifestationRequest(
+                i, "segments", float(result["score"]),
+                str(document.get("source_path", "")),
+                document.get("description", "untitled"),
+                float(document.get("start", 0.0)), float(document.get("end", 1.0)),
+                "[]", str(document.get("_id", "unknown")),
+                document.get("freq_low", 200), document.get("freq_high", 2000),
+                document.get("duration", 1.0)
+            )
             
-            orchestrator.queue_manifestation(manifestation_data)
+            orchestrator.queue_manifestation(request)
         
         print(f"Queued {len(segment_results)} manifestations")
         
@@ -337,14 +370,6 @@ def test_queue_all_strategy():
     except Exception as e:
         print(f"❌ Queue-all test failed: {e}")
         assert False, str(e)
-    
-    finally:
-        try:
-            db.client.drop_database("hibikido_queue_all_test")
-            db.close()
-        except:
-            pass
-        shutil.rmtree(temp_dir, ignore_errors=True)
 
 def test_osc_protocol_change():
     """Test the OSC protocol change from search to invocation."""
@@ -377,63 +402,8 @@ def test_osc_protocol_change():
     
     print("✅ OSC protocol change verified")
 
-def run_invocation_tests():
-    """Run all invocation paradigm tests."""
-    print("🚀 Running Invocation Paradigm Tests")
-    print("=" * 70)
-    
-    tests = [
-        ("OSC Protocol Change", test_osc_protocol_change),
-        ("Queue-All Strategy", test_queue_all_strategy),
-        ("Invocation→Manifestation Flow", test_invocation_manifestation_flow),
-    ]
-    
-    results = []
-    
-    for test_name, test_func in tests:
-        try:
-            print(f"\n{'='*70}")
-            print(f"Running: {test_name}")
-            print('='*70)
-            result = test_func()
-            results.append((test_name, result))
-            status = "✅ PASSED" if result else "❌ FAILED"
-            print(f"{status} {test_name}")
-        except Exception as e:
-            results.append((test_name, False))
-            print(f"❌ FAILED {test_name}: {e}")
-    
-    # Summary
-    print(f"\n{'='*70}")
-    print("📊 INVOCATION PARADIGM TEST SUMMARY")
-    print(f"{'='*70}")
-    
-    passed = sum(1 for _, result in results if result)
-    total = len(results)
-    
-    for test_name, result in results:
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{status} {test_name}")
-    
-    print(f"\n🎯 Overall: {passed}/{total} tests passed ({passed/total:.1%})")
-    
-    if passed == total:
-        print("\n🎉 All invocation paradigm tests passed!")
-        print("\nKey paradigm shifts verified:")
-        print("- OSC protocol: /search → /invoke, /result → /manifest")
-        print("- No completion signals - ongoing manifestation")
-        print("- Queue-all strategy: ALL search results go through orchestrator")
-        print("- Unified manifestation: orchestrator sends all /manifest messages")
-        print("- Time-frequency niche management with delayed manifestation")
-        print("- Transparent orchestration - client doesn't know about timing")
-        print("- Simplified server logic - search finds, orchestrator manifests")
-        print("\nReady for invocation! 🔮")
-    else:
-        print(f"\n⚠️  {total - passed} tests failed")
-        print("Check output above for details")
-    
-    return passed == total
-
 if __name__ == "__main__":
-    success = run_invocation_tests()
-    exit(0 if success else 1)
\ No newline at end of file
+    import sys
+    
+    # Tests are independent; run them in parallel with: -n 3 (pytest-xdist)
+    sys.exit(pytest.main([__file__, "-v", *sys.argv[1:]]))
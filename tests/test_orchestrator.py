@@ -7,12 +7,36 @@ Run with: python -m pytest test_orchestrator.py -v
 """
 
 import pytest
+import importlib.util
+import sys
 import time
 import logging
-from hibikido.orchestrator import Orchestrator
+import threading
+from collections import Counter, deque
+import numpy as np
+from hibikido.orchestrator import Orchestrator, ManifestationRequest, NS_PER_SECOND
+from hibikido import orchestrator as orchestrator_module
+from hibikido.orchestrator import _conflict_mask, _conflict_mask_loops, _conflict_mask_numpy
 
-# Configure logging for tests
-logging.basicConfig(level=logging.INFO)
+# Benchmarks need the pytest-benchmark plugin (dev extra); compare runs with
+# --benchmark-autosave and --benchmark-compare
+requires_benchmark = pytest.mark.skipif(
+    importlib.util.find_spec("pytest_benchmark") is None,
+    reason="pytest-benchmark not installed"
+)
+
+
+def _perf_manifestation(i: int) -> dict:
+    """Queued sound for the performance tests: ten bands, overlapping in part."""
+    return {
+        "index": i, "collection": "segments", "score": 0.8,
+        "path": f"test_{i}.wav", "description": f"Sound {i}",
+        "start": 0.0, "end": 1.0, "parameters": "[]",
+        "sound_id": f"perf_test_{i}",
+        "freq_low": 1000 + (i % 10) * 100,  # Some overlaps
+        "freq_high": 2000 + (i % 10) * 100,
+        "duration": 1.0
+    }
 
 class TestOrchestrator:
     """Test class for the orchestrator with manifestation protocol."""
@@ -22,6 +46,11 @@ class TestOrchestrator:
         """Create a test orchestrator instance."""
         return Orchestrator(overlap_threshold=0.2, time_precision=0.1)
     
+    @pytest.fixture
+    def clocked_orchestrator(self, fake_clock):
+        """Create a test orchestrator driven by fake_clock instead of wall time."""
+        return Orchestrator(overlap_threshold=0.2, time_precision=0.1, clock=fake_clock)
+    
     @pytest.fixture
     def manifestations_tracker(self):
         """Create a manifestation tracker for testing callbacks."""
@@ -48,7 +77,7 @@ class TestOrchestrator:
         assert orchestrator.overlap_threshold == 0.2
         assert orchestrator.time_precision == 0.1
         assert orchestrator.active_niches == []
-        assert orchestrator.queue == []
+        assert len(orchestrator.queue) == 0
         assert orchestrator.manifest_callback is None
     
     def test_manifest_callback_setup(self, orchestrator, manifestations_tracker):
@@ -84,10 +113,23 @@ class TestOrchestrator:
         assert success is True
         assert len(orchestrator.queue) == 1
         
-        queued_data, request_time = orchestrator.queue[0]
-        assert queued_data["sound_id"] == "test_sound_1"
+        queued_request, request_time = orchestrator.queue[0]
+        assert isinstance(queued_request, ManifestationRequest)
+        assert queued_request.sound_id == "test_sound_1"
+        assert queued_request.freq_low == 1000.0
         assert request_time > 0
     
+    def test_queue_manifestation_request(self, orchestrator):
+        """Test queueing a ManifestationRequest directly (slotted, defaults applied)."""
+        request = ManifestationRequest(0, "segments", 0.9, "test/sound.wav", "Test sound",
+                                       0.0, 1.0, sound_id="direct")
+        assert not hasattr(request, "__dict__")
+        
+        assert orchestrator.queue_manifestation(request) is True
+        queued_request, _ = orchestrator.queue[0]
+        assert queued_request is request
+        assert (queued_request.freq_low, queued_request.freq_high) == (200.0, 2000.0)
+    
     def test_queue_multiple_manifestations(self, orchestrator):
         """Test queueing multiple manifestations."""
         manifestations = []
@@ -114,8 +156,8 @@ class TestOrchestrator:
         
         # Verify FIFO order
         for i in range(3):
-            queued_data, _ = orchestrator.queue[i]
-            assert queued_data["sound_id"] == f"test_sound_{i}"
+            queued_request, _ = orchestrator.queue[i]
+            assert queued_request.sound_id == f"test_sound_{i}"
     
     def test_queue_processing_no_conflicts(self, orchestrator, manifestations_tracker):
         """Test queue processing when no frequency conflicts exist."""
@@ -204,8 +246,9 @@ class TestOrchestrator:
         
         print(f"Manifested: {len(manifestations)}, Queued: {len(orchestrator.queue)}")
     
-    def test_time_based_manifestation(self, orchestrator, manifestations_tracker):
+    def test_time_based_manifestation(self, clocked_orchestrator, fake_clock, manifestations_tracker):
         """Test that queued sounds manifest when conflicts expire."""
+        orchestrator = clocked_orchestrator
         manifestations, callback = manifestations_tracker
         orchestrator.set_manifest_callback(callback)
         
@@ -239,8 +282,8 @@ class TestOrchestrator:
         
         print(f"After first update: {initial_manifestations} manifested, {initial_queue_size} queued")
         
-        # Wait for short sound to expire
-        time.sleep(0.15)
+        # Let the short sound expire
+        fake_clock.advance(0.15)
         
         # Second update - waiting sound should now manifest
         before_delayed = len(manifestations)
@@ -250,14 +293,10 @@ class TestOrchestrator:
         delayed_manifestations = after_delayed - before_delayed
         print(f"After delay: {delayed_manifestations} additional manifestations")
         
-        # Should have processed at least the initial sound
-        assert initial_manifestations >= 1
-        
-        # Might have delayed manifestation (timing dependent)
-        if delayed_manifestations > 0:
-            print("✅ Time-based manifestation working")
-        else:
-            print("ℹ️  No delayed manifestation (timing dependent)")
+        assert initial_manifestations == 1
+        assert initial_queue_size == 1
+        assert delayed_manifestations == 1
+        assert len(orchestrator.queue) == 0
     
     def test_logarithmic_frequency_overlap(self, orchestrator):
         """Test logarithmic frequency overlap calculation."""
@@ -283,15 +322,65 @@ class TestOrchestrator:
         octave_1_2 = orchestrator._has_frequency_overlap(1000, 2000, 2000, 4000)
         print(f"Adjacent octaves overlap: {octave_1_2}")
     
+    @pytest.mark.parametrize("threshold", [0.0, 0.2, 0.5])
+    def test_conflict_kernels_agree(self, threshold):
+        """Test the loop kernel (numba source) matches the NumPy broadcast."""
+        rng = np.random.default_rng(0)
+        q_low = rng.uniform(0, 12, 200)
+        q_high = q_low + rng.choice([0.0, -0.5, 0.1, 1.0, 3.0], 200)
+        log_low = rng.uniform(0, 12, 40)
+        log_high = log_low + rng.choice([0.0, 0.2, 1.0, 2.0], 40)
+        
+        expected = _conflict_mask_numpy(q_low, q_high, log_low, log_high, threshold)
+        assert expected.any() and not expected.all()
+        np.testing.assert_array_equal(
+            _conflict_mask_loops(q_low, q_high, log_low, log_high, threshold), expected)
+        np.testing.assert_array_equal(
+            _conflict_mask(q_low, q_high, log_low, log_high, threshold), expected)
+    
+    def test_failing_kernel_falls_back_to_numpy(self, monkeypatch, caplog):
+        """Test a compiled kernel that fails at call time is replaced by the NumPy broadcast."""
+        def broken_kernel(*args):
+            raise TypeError("cannot determine numba type")
+        monkeypatch.setattr(orchestrator_module, "_conflict_kernel", broken_kernel)
+        
+        q_low, q_high = np.array([1.0, 5.0]), np.array([2.0, 6.0])
+        log_low, log_high = np.array([1.5]), np.array([2.5])
+        with caplog.at_level(logging.WARNING, logger="hibikido.orchestrator"):
+            mask = _conflict_mask(q_low, q_high, log_low, log_high, 0.2)
+        
+        assert mask.tolist() == [True, False]
+        assert orchestrator_module._conflict_kernel is _conflict_mask_numpy
+        assert any("falling back to NumPy" in r.getMessage() for r in caplog.records)
+    
+    def test_any_conflict_matches_kernel(self, orchestrator):
+        """Test the bisected scan over sorted pass bands matches the full broadcast."""
+        rng = np.random.default_rng(1)
+        q_low = rng.uniform(0, 12, 200)
+        q_high = q_low + rng.choice([0.0, 0.1, 1.0, 3.0], 200)
+        log_low = rng.uniform(0, 12, 40)
+        log_high = log_low + rng.choice([0.2, 1.0, 2.0], 40)
+        bands = sorted(zip(log_low.tolist(), log_high.tolist(), [10] * 40))
+        
+        expected = _conflict_mask_numpy(q_low, q_high, log_low, log_high,
+                                        orchestrator.overlap_threshold)
+        found = [orchestrator._any_conflict(low, high, 0, bands)
+                 for low, high in zip(q_low.tolist(), q_high.tolist())]
+        assert found == expected.tolist()
+        # Expired bands are ignored
+        assert not any(orchestrator._any_conflict(low, high, 10, bands)
+                       for low, high in zip(q_low.tolist(), q_high.tolist()))
+    
     def test_niche_cleanup(self, orchestrator):
         """Test that expired niches are cleaned up."""
         # Manually add an expired niche
-        past_time = time.time() - 10  # 10 seconds ago
-        orchestrator._register_niche("expired_sound", past_time, past_time + 1, 1000, 2000)
+        past_time = time.monotonic_ns() - 10 * NS_PER_SECOND  # 10 seconds ago
+        orchestrator._register_niche("expired_sound", past_time, past_time + NS_PER_SECOND,
+                                     1000, 2000)
         
         # Add a current niche
-        now = time.time()
-        orchestrator._register_niche("current_sound", now, now + 10, 2000, 3000)
+        now = time.monotonic_ns()
+        orchestrator._register_niche("current_sound", now, now + 10 * NS_PER_SECOND, 2000, 3000)
         
         assert len(orchestrator.active_niches) == 2
         
@@ -301,6 +390,102 @@ class TestOrchestrator:
         assert len(orchestrator.active_niches) == 1
         assert orchestrator.active_niches[0]["sound_id"] == "current_sound"
     
+    def test_niche_cleanup_out_of_order(self, orchestrator):
+        """Test cleanup when niches expire in a different order than registered."""
+        now = time.monotonic_ns()
+        orchestrator._register_niche("long_sound", now, now + 10 * NS_PER_SECOND, 2000, 3000)
+        orchestrator._register_niche("expired_sound", now - 10 * NS_PER_SECOND,
+                                     now - 5 * NS_PER_SECOND, 1000, 2000)
+        orchestrator._register_niche("medium_sound", now, now + 5 * NS_PER_SECOND, 4000, 5000)
+        
+        orchestrator._cleanup_expired()
+        
+        assert [n["sound_id"] for n in orchestrator.active_niches] == ["medium_sound", "long_sound"]
+    
+    def test_contains_tracks_queued_and_active_sounds(self, clocked_orchestrator, fake_clock, manifestations_tracker):
+        """Test O(1) membership for sounds that are queued or playing."""
+        orchestrator = clocked_orchestrator
+        _, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        request = ManifestationRequest(0, "segments", 0.9, "test.wav", "Test", 0.0, 1.0,
+                                       sound_id="tracked", duration=0.05)
+        assert not orchestrator.contains("tracked")
+        
+        orchestrator.queue_manifestation(request)
+        assert orchestrator.contains("tracked")
+        
+        # Manifested: no longer queued, but playing in its niche
+        orchestrator.update()
+        assert len(orchestrator.queue) == 0
+        assert orchestrator.contains("tracked")
+        
+        # Niche expired
+        fake_clock.advance(0.1)
+        orchestrator.update()
+        assert not orchestrator.contains("tracked")
+    
+    def test_cancel_queued_and_active(self, orchestrator, manifestations_tracker):
+        """Test cancelled sounds leave the queue and free their niche on update."""
+        manifestations, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        playing = ManifestationRequest(0, "segments", 0.9, "a.wav", "Playing", 0.0, 1.0,
+                                       sound_id="playing", duration=10.0)
+        waiting = ManifestationRequest(1, "segments", 0.8, "b.wav", "Waiting", 0.0, 1.0,
+                                       sound_id="waiting", duration=10.0)
+        orchestrator.queue_manifestation(playing)
+        orchestrator.update()
+        orchestrator.queue_manifestation(waiting)
+        orchestrator.update()
+        assert len(manifestations) == 1
+        assert len(orchestrator.queue) == 1
+        
+        assert orchestrator.cancel("waiting")
+        assert not orchestrator.contains("waiting")
+        assert not orchestrator.cancel("never_queued")
+        orchestrator.update()
+        assert len(orchestrator.queue) == 0
+        
+        # Cancelling the playing sound frees its niche for the next request
+        assert orchestrator.cancel("playing")
+        orchestrator.update()
+        assert orchestrator.get_stats()["active_niches"] == 0
+        
+        orchestrator.queue_manifestation(waiting)
+        orchestrator.update()
+        assert len(manifestations) == 2
+    
+    def test_cancel_then_requeue_before_update(self, orchestrator, manifestations_tracker):
+        """Test a sound queued again after cancel() survives the sweep of its old entries."""
+        manifestations, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        playing = ManifestationRequest(0, "segments", 0.9, "a.wav", "Playing", 0.0, 1.0,
+                                       sound_id="playing", duration=10.0)
+        orchestrator.queue_manifestation(playing)
+        orchestrator.update()
+        orchestrator.queue_manifestation(ManifestationRequest(
+            1, "segments", 0.8, "b.wav", "Old", 0.0, 1.0, sound_id="waiting", duration=1.0))
+        orchestrator.update()
+        
+        assert orchestrator.cancel("waiting")
+        assert not orchestrator.contains("waiting")
+        orchestrator.queue_manifestation(ManifestationRequest(
+            2, "segments", 0.8, "b.wav", "New", 0.0, 1.0, sound_id="waiting", duration=1.0))
+        assert orchestrator.contains("waiting")
+        
+        orchestrator.update()
+        assert [request.description for request, _ in orchestrator.queue] == ["New"]
+        assert orchestrator._sound_counts["waiting"] == 1
+        assert orchestrator.contains("waiting")
+        
+        # Cancelling again drops the re-queued request too
+        assert orchestrator.cancel("waiting")
+        orchestrator.update()
+        assert len(orchestrator.queue) == 0
+        assert not orchestrator.contains("waiting")
+    
     def test_orchestrator_stats(self, orchestrator):
         """Test orchestrator statistics."""
         # Initial stats
@@ -322,8 +507,8 @@ class TestOrchestrator:
         orchestrator.queue_manifestation(manifestation_data)
         
         # Add active niche manually
-        now = time.time()
-        orchestrator._register_niche("active_test", now, now + 10, 3000, 4000)
+        now = time.monotonic_ns()
+        orchestrator._register_niche("active_test", now, now + 10 * NS_PER_SECOND, 3000, 4000)
         
         stats = orchestrator.get_stats()
         assert stats["active_niches"] == 1
@@ -390,6 +575,141 @@ class TestOrchestrator:
         # Processing should handle gracefully
         orchestrator.update()  # Should not crash
     
+    def test_duplicate_requests_coalesced(self, orchestrator, manifestations_tracker):
+        """Test repeated requests for a blocked sound collapse to one queue entry."""
+        manifestations, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        orchestrator.queue_manifestation(ManifestationRequest(
+            0, "segments", 0.9, "a.wav", "Playing", 0.0, 1.0, sound_id="playing", duration=10.0))
+        orchestrator.update()
+        
+        for score in (0.5, 0.6, 0.7):
+            orchestrator.queue_manifestation(ManifestationRequest(
+                1, "segments", score, "b.wav", "Waiting", 0.0, 1.0, sound_id="waiting"))
+        orchestrator.update()
+        
+        assert len(orchestrator.queue) == 1
+        queued_request, _ = orchestrator.queue[0]
+        assert queued_request.score == 0.7
+        
+        orchestrator.cancel("waiting")
+        orchestrator.update()
+        assert not orchestrator.contains("waiting")
+    
+    def test_blocked_queue_skipped_until_niche_frees(self, clocked_orchestrator, fake_clock,
+                                                     manifestations_tracker):
+        """Test update() skips the queue pass while nothing can have unblocked."""
+        orchestrator = clocked_orchestrator
+        manifestations, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        orchestrator.queue_manifestation(ManifestationRequest(
+            0, "segments", 0.9, "a.wav", "Playing", 0.0, 1.0, sound_id="playing", duration=1.0))
+        orchestrator.queue_manifestation(ManifestationRequest(
+            1, "segments", 0.8, "b.wav", "Waiting", 0.0, 1.0, sound_id="waiting", duration=1.0))
+        orchestrator.update()
+        assert len(manifestations) == 1
+        
+        passes = []
+        queue_conflicts = orchestrator._queue_conflicts
+        orchestrator._queue_conflicts = lambda *args: passes.append(1) or queue_conflicts(*args)
+        
+        orchestrator.update()
+        fake_clock.advance(0.5)
+        orchestrator.update()
+        assert passes == []
+        
+        # The blocking niche expires: the next pass runs and manifests
+        fake_clock.advance(0.6)
+        orchestrator.update()
+        assert passes == [1]
+        assert len(manifestations) == 2
+    
+    def test_update_between_track_and_enqueue(self, clocked_orchestrator, manifestations_tracker):
+        """Test a request is not skipped when update() runs while it is being queued."""
+        orchestrator = clocked_orchestrator
+        manifestations, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        orchestrator.queue_manifestation(ManifestationRequest(
+            0, "segments", 0.9, "a.wav", "Playing", 0.0, 1.0, sound_id="playing", duration=10.0))
+        orchestrator.queue_manifestation(ManifestationRequest(
+            1, "segments", 0.8, "a.wav", "Blocked", 0.0, 1.0, sound_id="blocked", duration=1.0))
+        orchestrator.update()
+        assert len(manifestations) == 1
+        
+        class UpdateBeforeAppend(deque):
+            """Runs the consumer after the sound is tracked but before it is enqueued."""
+            def append(self, entry):
+                orchestrator.update()
+                super().append(entry)
+        
+        orchestrator.queue = UpdateBeforeAppend(orchestrator.queue)
+        orchestrator.queue_manifestation(ManifestationRequest(
+            2, "segments", 0.7, "c.wav", "Free", 0.0, 1.0, sound_id="free",
+            freq_low=50, freq_high=100, duration=1.0))
+        assert orchestrator.contains("free")
+        
+        orchestrator.update()
+        assert [m["description"] for m in manifestations] == ["Playing", "Free"]
+        assert [request.sound_id for request, _ in orchestrator.queue] == ["blocked"]
+    
+    def test_concurrent_producer_loses_nothing(self, manifestations_tracker, caplog):
+        """Test requests queued from another thread during update() all get processed."""
+        orchestrator = Orchestrator()
+        manifestations, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        def produce():
+            # Repeated sound_ids make update() coalesce as well as process
+            for i in range(3000):
+                orchestrator.queue_manifestation(ManifestationRequest(
+                    i, "segments", 0.5, "p.wav", "Tone", 0.0, 1.0,
+                    sound_id=f"s{i % 2000}", freq_low=440, freq_high=440, duration=60.0))
+        
+        # Switch threads as often as possible to interleave with update()
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            producer = threading.Thread(target=produce)
+            producer.start()
+            while producer.is_alive():
+                orchestrator.update()
+            producer.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        orchestrator.update()
+        
+        assert len(orchestrator.queue) == 0
+        manifested_ids = {niche["sound_id"] for niche in orchestrator.active_niches}
+        assert manifested_ids == {f"s{i}" for i in range(2000)}
+        # Each sound is tracked exactly once per active niche
+        assert orchestrator._sound_counts == Counter(
+            niche["sound_id"] for niche in orchestrator.active_niches)
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    
+    def test_point_niches_never_block(self, clocked_orchestrator, fake_clock, manifestations_tracker):
+        """Test zero-width niches are active but kept out of the conflict table."""
+        orchestrator = clocked_orchestrator
+        manifestations, callback = manifestations_tracker
+        orchestrator.set_manifest_callback(callback)
+        
+        for i in range(3):
+            orchestrator.queue_manifestation(ManifestationRequest(
+                i, "segments", 0.8, f"tone{i}.wav", "Tone", 0.0, 1.0,
+                sound_id=f"tone{i}", freq_low=440, freq_high=440, duration=0.05))
+        orchestrator.update()
+        
+        assert len(manifestations) == 3
+        assert orchestrator.get_stats()["active_niches"] == 3
+        assert orchestrator._n_niches == 0
+        
+        fake_clock.advance(0.1)
+        orchestrator.update()
+        assert orchestrator.get_stats()["active_niches"] == 0
+        assert not orchestrator.contains("tone0")
+    
     def test_legacy_evaluate_request(self, orchestrator):
         """Test that legacy evaluate_request method still works but is deprecated."""
         request = {
@@ -479,40 +799,40 @@ class TestOrchestratorIntegration:
         orchestrator.set_manifest_callback(count_manifestations)
         
         # Queue many sounds with various overlaps
-        start_time = time.time()
-        
         for i in range(50):
-            manifestation_data = {
-                "index": i, "collection": "segments", "score": 0.8,
-                "path": f"test_{i}.wav", "description": f"Sound {i}",
-                "start": 0.0, "end": 1.0, "parameters": "[]",
-                "sound_id": f"perf_test_{i}",
-                "freq_low": 1000 + (i % 10) * 100,  # Some overlaps
-                "freq_high": 2000 + (i % 10) * 100,
-                "duration": 1.0
-            }
-            orchestrator.queue_manifestation(manifestation_data)
-        
-        queue_time = time.time() - start_time
+            assert orchestrator.queue_manifestation(_perf_manifestation(i))
         
         # Process queue
-        process_start = time.time()
         orchestrator.update()
-        process_time = time.time() - process_start
         
-        print(f"Queued 50 sounds in {queue_time:.3f}s")
-        print(f"Processed queue in {process_time:.3f}s")
         print(f"Manifested {manifestation_count} sounds immediately")
         print(f"Remaining queued: {len(orchestrator.queue)}")
         
-        # Should be reasonably fast
-        assert queue_time < 0.1, f"Queueing too slow: {queue_time:.3f}s"
-        assert process_time < 0.1, f"Processing too slow: {process_time:.3f}s"
-        
-        # Should have processed some sounds
+        # Should have processed some sounds; timings are covered by the benchmarks
         assert manifestation_count > 0
+        assert manifestation_count + len(orchestrator.queue) == 50
         
         print("✅ Performance test passed")
+    
+    @requires_benchmark
+    def test_benchmark_queue_manifestation(self, benchmark):
+        """Benchmark ingesting one manifestation dict."""
+        orchestrator = Orchestrator()
+        data = _perf_manifestation(0)
+        
+        assert benchmark(orchestrator.queue_manifestation, data)
+    
+    @requires_benchmark
+    def test_benchmark_update(self, benchmark):
+        """Benchmark one update() over 50 freshly queued sounds."""
+        def queued_orchestrator():
+            orchestrator = Orchestrator()
+            orchestrator.set_manifest_callback(lambda *args: None)
+            for i in range(50):
+                orchestrator.queue_manifestation(_perf_manifestation(i))
+            return (orchestrator,), {}
+        
+        benchmark.pedantic(Orchestrator.update, setup=queued_orchestrator, rounds=200)
 
 
 if __name__ == "__main__":
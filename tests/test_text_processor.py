@@ -7,6 +7,7 @@ Test the updated text processor with hierarchical context using path-based refer
 
 import tempfile
 import shutil
+import pytest
 from hibikido.database_manager import HibikidoDatabase
 from hibikido.embedding_manager import EmbeddingManager
 from hibikido.text_processor import TextProcessor
@@ -497,6 +498,33 @@ def test_text_processor_edge_cases():
     print("\n✅ All edge case tests passed!")
     # Don't return True/False, just pass or assert
 
+def test_spacy_keywords_drop_audio_stop_word_lemmas():
+    """Plural audio stop words must not survive lemmatization."""
+    text_processor = TextProcessor()
+    if not (text_processor.nlp and text_processor.spacy_working):
+        pytest.skip("spaCy model not available")
+    
+    keywords = text_processor._extract_keywords_spacy("bright sounds from old recordings")
+    
+    assert "sound" not in keywords
+    assert "recording" not in keywords
+    assert "bright" in keywords
+
+def test_primed_keywords_reused_across_rebuilds():
+    """Priming the same descriptions again must not re-run the spaCy pipeline."""
+    text_processor = TextProcessor()
+    if not (text_processor.nlp and text_processor.spacy_working):
+        pytest.skip("spaCy model not available")
+    
+    descriptions = ["bright bird call at dawn", "deep rumbling thunder", "soft rain on leaves"]
+    for _ in range(3):
+        text_processor.prime_keywords(descriptions)
+        keywords = [text_processor._extract_keywords(text, 20) for text in descriptions]
+    
+    assert text_processor.prime_keywords(descriptions) == 0
+    assert len(text_processor._spacy_keywords) == len(descriptions)
+    assert "thunder" in keywords[1]
+
 if __name__ == "__main__":
     print("🚀 Running Path-based Hierarchical Text Processor Tests")
     print("=" * 70)